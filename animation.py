@@ -1,14 +1,23 @@
 import tkinter as tk
 from glob import glob
+from time import perf_counter
 from typing import Callable
+from atlas import load_sequence
 
 
-def load_frames(directory: str) -> list[tk.PhotoImage]:
-    '''Create a list with every frame of the animation.'''
+def load_frames(directory: str, master: tk.Misc = None) -> list[tk.PhotoImage]:
+    '''
+    Create a list with every frame of the animation.\n
+    The frames are cut from the sprite sheet of the theme when atlas.py has built one.
+    They belong to the interpreter of 'master', the default root without one.
+    '''
+    if (frames := load_sequence(directory, master)) is not None:
+        return frames
+
     frames = list()
 
     for file in _get_files(directory):
-        frames.append(tk.PhotoImage(file=f'{directory}/{file}.png'))
+        frames.append(tk.PhotoImage(master=master, file=f'{directory}/{file}.png'))
 
     return frames
 
@@ -28,9 +37,78 @@ def _get_files(directory: str) -> list[str]:
     return file_names
 
 
-class Sprite(tk.Label):
+# milliseconds between the ticks of the frame scheduler
+TICK_MS = 10
+
+
+class FrameScheduler:
     '''
-    Custom Tkinter Label class to play animations.\n
+    Advances the animations and timers of every sprite of a window from a single after( ) timer.\n
+    The timer only runs while a sprite has something due, and stop( ) cancels it.\n
+    A frame shown a whole frame period or more after its time counts as dropped.
+    '''
+    def __init__(self, root: tk.Misc, tick_ms: int = TICK_MS):
+        self.root = root
+        self.tick_ms = tick_ms
+        self.tick_id = None
+
+        # sprites with a frame or timer due
+        self.active = set()
+
+        self.frames = 0
+        self.dropped_frames = 0
+
+
+    @staticmethod
+    def now() -> float:
+        return perf_counter() * 1000
+
+
+    def update(self, sprite: 'Animated'):
+        '''Starts or stops tracking the sprite, depending on whether it has something due.'''
+        if sprite.frame_due is None and sprite.timer_due is None:
+            self.active.discard(sprite)
+            return
+
+        self.active.add(sprite)
+        if self.tick_id is None:
+            self.tick_id = self.root.after(self.tick_ms, self._tick)
+
+
+    def stop(self):
+        '''Stops every animation and timer.'''
+        for sprite in list(self.active):
+            sprite.frame_due = sprite.timer_due = None
+        self.active.clear()
+
+        if self.tick_id is not None:
+            self.root.after_cancel(self.tick_id)
+            self.tick_id = None
+
+
+    def _tick(self):
+        '''Advances the sprites that have a frame or timer due.'''
+        self.tick_id = None
+        now = self.now()
+
+        for sprite in list(self.active):
+            sprite._advance(now)
+
+        if self.active and self.tick_id is None:
+            self.tick_id = self.root.after(self.tick_ms, self._tick)
+
+
+def get_scheduler(root: tk.Misc) -> FrameScheduler:
+    '''Returns the frame scheduler of the window, creating it on first use.'''
+    scheduler = getattr(root, 'frame_scheduler', None)
+    if scheduler is None:
+        scheduler = root.frame_scheduler = FrameScheduler(root)
+    return scheduler
+
+
+class Animated:
+    '''
+    Animation queue of an image, shared by Sprite and CanvasSprite.\n
 
     The play( ) method can be used to play a specific sequence or to start the queued animations.\n
 
@@ -38,15 +116,26 @@ class Sprite(tk.Label):
 
     Animations can be queued with the chain( ) method.
         If the animation is running, the next sequence plays when 
-        the previous one automatically stops or if the next( ) method is called manually.
+        the previous one automatically stops or if the next( ) method is called manually.\n
 
+    Frames and timers are run by the FrameScheduler of the main window.\n
+    Subclasses show each image with self['image'] = image.
     '''
-    def __init__(self, main_window:tk.Tk, master:tk.Frame = None, image:tk.PhotoImage = None):
-        super().__init__(master, image=image, relief=tk.FLAT, borderwidth=0, highlightthickness=0)
-
+    def _init_animation(self, main_window:tk.Tk):
+        '''Sets the state of the animation queue.'''
         self.root = main_window
-        self.stop_id = None
+        self.scheduler = get_scheduler(main_window)
         self.queue = list()
+
+        # running sequence, the frame shown next and when it is due
+        self.sequence = None
+        self.loop = False
+        self.frame = 0
+        self.frame_ms = 0
+        self.frame_due = None
+
+        # time when next( ) is called by the timer of the current item
+        self.timer_due = None
     
 
     def play(self, sequence:list[tk.PhotoImage] = None, loop:bool = False, fps:int = 15, timer:int = None):
@@ -55,7 +144,7 @@ class Sprite(tk.Label):
             self.stop()
             self._start_animation(sequence, loop, fps)
             if timer is not None:
-                self.root.after(timer, self.next)
+                self._set_timer(timer)
         else:
             self.next()
 
@@ -63,17 +152,19 @@ class Sprite(tk.Label):
     def next(self):
         '''Jumps to the next item in the queue.'''
         self.stop()
+        self.timer_due = None
 
-        if not self.queue:
-            return
+        if self.queue:
+            self._handle_queue()
 
-        self._handle_queue()
+        self.scheduler.update(self)
 
 
     def stop(self):
         '''Stops the animation'''
-        if self.stop_id:
-            self.root.after_cancel(self.stop_id)
+        self.sequence = None
+        self.frame_due = None
+        self.scheduler.update(self)
 
 
     def chain(self, sequence:list[tk.PhotoImage], timer:int = None, loop:bool = False, fps:int = 15):
@@ -102,6 +193,29 @@ class Sprite(tk.Label):
         self.queue = list()
 
 
+    def apply_theme(self, convert:Callable):
+        '''
+        Replaces the images of another theme with the ones returned by convert,
+        in the image shown, the running sequence and the queue.\n
+        convert returns None for images that don't change.
+        '''
+        def convert_sequence(sequence:list[tk.PhotoImage]) -> list[tk.PhotoImage]:
+            return [convert(frame) or frame for frame in sequence]
+
+        if image := convert(self['image']):
+            self['image'] = image
+
+        if self.sequence:
+            self.sequence = convert_sequence(self.sequence)
+
+        for index, info in enumerate(self.queue):
+            item = info[0]
+            if isinstance(item, list):
+                self.queue[index] = (convert_sequence(item), *info[1:])
+            elif isinstance(item, tk.PhotoImage):
+                self.queue[index] = (convert(item) or item, *info[1:])
+
+
     def _handle_queue(self):
         '''Handles the different types of items in the queue.'''
         item = self.queue[0][0]
@@ -123,24 +237,108 @@ class Sprite(tk.Label):
 
         timer = info[-1]
         if timer is not None:
-            self.root.after(timer, self.next)
+            self._set_timer(timer)
+
+
+    def _set_timer(self, timer:int):
+        '''Calls next( ) once the timer runs out, replacing the previous timer.'''
+        self.timer_due = self.scheduler.now() + timer
+        self.scheduler.update(self)
 
 
-    def _start_animation(self, sequence:list[tk.PhotoImage], loop:bool, fps:int, _frame:int = 0):
+    def _start_animation(self, sequence:list[tk.PhotoImage], loop:bool, fps:int):
         '''Starts the animation sequence.'''
-        self['image'] = sequence[_frame]
+        self.sequence = sequence
+        self.loop = loop
+        self.frame = 0
+        self.frame_ms = 1000 / fps
+        self.frame_due = None
 
-        if _frame < len(sequence)-1:
-            _frame += 1
-        elif loop:
-            _frame = 0
-        elif self.queue:
-            self.next()
-            return
+        self._show_frame(self.scheduler.now())
+
+
+    def _show_frame(self, now:float):
+        '''Shows the current frame of the sequence and sets when the next one is due.'''
+        self['image'] = self.sequence[self.frame]
+        self.scheduler.frames += 1
+
+        if self.frame < len(self.sequence)-1:
+            self.frame += 1
+        elif self.loop:
+            self.frame = 0
         else:
+            self.stop()
+            if self.queue:
+                self.next()
             return
 
-        if self.stop_id:
-            self.stop_id = None
+        self.frame_due = (self.frame_due or now) + self.frame_ms
+        self.scheduler.update(self)
+
+
+    def _advance(self, now:float):
+        '''Shows the frame or runs the timer that are due, called by the scheduler.'''
+        if self.frame_due is not None and now >= self.frame_due:
+            late = now - self.frame_due
+
+            # a late frame keeps its place in the sequence, the timing restarts from now
+            if late >= self.frame_ms:
+                self.scheduler.dropped_frames += int(late // self.frame_ms)
+                self.frame_due = now
+
+            self._show_frame(now)
+
+        if self.timer_due is not None and now >= self.timer_due:
+            self.next()
+
+        self.scheduler.update(self)
+
+
+class Sprite(Animated, tk.Label):
+    '''
+    Custom Tkinter Label class to play animations.\n
+    The label keeps the image it shows and is only configured when the image changes.
+    '''
+    def __init__(self, main_window:tk.Tk, master:tk.Frame = None, image:tk.PhotoImage = None):
+        tk.Label.__init__(self, master, image=image, relief=tk.FLAT, borderwidth=0, highlightthickness=0)
+        self.image = image
+        self._init_animation(main_window)
+
+
+    def __setitem__(self, key:str, value):
+        if key == 'image':
+            if value is self.image:
+                return
+            self.image = value
+        tk.Label.__setitem__(self, key, value)
+
+
+class CanvasSprite(Animated):
+    '''
+    Image item of a canvas that plays animations like a Sprite.\n
+    The item is only configured when its image changes, so unchanged cells are never redrawn.
+    '''
+    def __init__(self, main_window:tk.Tk, canvas:tk.Canvas, item:int, image:tk.PhotoImage):
+        self.canvas = canvas
+        self.item = item
+        self.image = image
+        self._init_animation(main_window)
+
+
+    def __getitem__(self, key:str):
+        if key == 'image':
+            return str(self.image) if self.image is not None else ''
+        return self.canvas.itemcget(self.item, key)
+
+
+    def __setitem__(self, key:str, value):
+        if key == 'image':
+            if value is self.image:
+                return
+            self.image = value
+        self.canvas.itemconfigure(self.item, {key: value})
+
 
-        self.stop_id = self.root.after(1000//fps, self._start_animation, sequence, loop, fps, _frame)
+    def bind(self, sequence:str, func:Callable):
+        '''Binds an event of the item.'''
+        return self.canvas.tag_bind(self.item, sequence, func)
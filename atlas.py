@@ -0,0 +1,266 @@
+import json
+import os
+import struct
+import zlib
+import tkinter as tk
+
+
+SPRITE_DIR = 'assets/sprites'
+ATLAS_DIR = 'assets/atlas'
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# bytes per pixel, only 8 bit RGBA images are packed
+PIXEL_BYTES = 4
+
+# widest row of frames in a sheet, longer sequences continue on the next row
+MAX_WIDTH = 2048
+
+
+def read_png(path: str) -> tuple[int, int, list[bytes]]:
+    '''Returns the width, height and rows of RGBA pixels of a png file.'''
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    if data[:8] != PNG_SIGNATURE:
+        raise ValueError(f'{path} is not a png file')
+
+    chunks = []
+    pos = 8
+    while pos < len(data):
+        size, kind = struct.unpack_from('>I4s', data, pos)
+        chunks.append((kind, data[pos+8:pos+8+size]))
+        pos += size + 12
+
+    width, height, depth, color, _, _, interlace = struct.unpack('>IIBBBBB', chunks[0][1])
+    if depth != 8 or color != 6 or interlace:
+        raise ValueError(f'{path} is not an 8 bit RGBA png without interlacing')
+
+    raw = zlib.decompress(b''.join(chunk for kind, chunk in chunks if kind == b'IDAT'))
+    return width, height, _unfilter(raw, width, height)
+
+
+def write_png(path: str, width: int, height: int, rows: list[bytes]):
+    '''Writes rows of RGBA pixels to a png file.'''
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+
+    # every row uses the 'none' filter
+    raw = b''.join(b'\x00' + row for row in rows)
+
+    with open(path, 'wb') as file:
+        file.write(PNG_SIGNATURE)
+        file.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)))
+        file.write(chunk(b'IDAT', zlib.compress(raw, 9)))
+        file.write(chunk(b'IEND', b''))
+
+
+def _unfilter(raw: bytes, width: int, height: int) -> list[bytes]:
+    '''Reverses the png filter of every row.'''
+    stride = width * PIXEL_BYTES
+    rows = []
+    previous = bytes(stride)
+    pos = 0
+
+    for _ in range(height):
+        kind = raw[pos]
+        row = bytearray(raw[pos+1:pos+1+stride])
+        pos += stride + 1
+
+        if kind == 1:
+            for i in range(PIXEL_BYTES, stride):
+                row[i] = (row[i] + row[i-PIXEL_BYTES]) & 0xff
+        elif kind == 2:
+            row = bytearray((a + b) & 0xff for a, b in zip(row, previous))
+        elif kind == 3:
+            for i in range(stride):
+                left = row[i-PIXEL_BYTES] if i >= PIXEL_BYTES else 0
+                row[i] = (row[i] + (left + previous[i]) // 2) & 0xff
+        elif kind == 4:
+            for i in range(stride):
+                left = row[i-PIXEL_BYTES] if i >= PIXEL_BYTES else 0
+                up_left = previous[i-PIXEL_BYTES] if i >= PIXEL_BYTES else 0
+                up = previous[i]
+
+                estimate = left + up - up_left
+                distance_left, distance_up, distance_up_left = abs(estimate - left), abs(estimate - up), abs(estimate - up_left)
+
+                if distance_left <= distance_up and distance_left <= distance_up_left:
+                    row[i] = (row[i] + left) & 0xff
+                elif distance_up <= distance_up_left:
+                    row[i] = (row[i] + up) & 0xff
+                else:
+                    row[i] = (row[i] + up_left) & 0xff
+
+        rows.append(bytes(row))
+        previous = row
+
+    return rows
+
+
+def _frame_files(directory: str) -> list[str]:
+    '''Returns the png files of the directory sorted by frame number, like animation.load_frames( ).'''
+    names = [name[:-4] for name in os.listdir(directory) if name.endswith('.png')]
+    prefix = len(names[0].rstrip('0123456789'))
+    names.sort(key=lambda name: int(name[prefix:]))
+
+    return [f'{directory}/{name}.png' for name in names]
+
+
+def _find_sources(theme: str) -> tuple[dict[str, list[str]], dict[str, str]]:
+    '''
+    Returns the frame files of every sequence and the file of every still image of the theme.\n
+    Sequences are the directories of frames, still images are the png files in
+    the theme directory whose name does not end with a number.
+    '''
+    base = f'{SPRITE_DIR}/{theme}'
+    sequences = {}
+    images = {}
+
+    for directory, _, files in sorted(os.walk(base)):
+        if directory != base and any(name.endswith('.png') for name in files):
+            sequences[directory[len(base)+1:].replace(os.sep, '/')] = _frame_files(directory)
+
+    for name in sorted(os.listdir(base)):
+        if name.endswith('.png') and not name[:-4][-1].isdigit():
+            images[name[:-4]] = f'{base}/{name}'
+
+    return sequences, images
+
+
+def build_atlas(theme: str) -> int:
+    '''
+    Packs every frame and still image of a theme into one sprite sheet.\n
+    Writes '{ATLAS_DIR}/{theme}.png' and an index with the region of every
+    frame to '{ATLAS_DIR}/{theme}.json'. Returns the amount of images packed.
+    '''
+    sequences, images = _find_sources(theme)
+
+    # every sequence and every still image starts a new row of the sheet
+    groups = [('sequences', name, files) for name, files in sequences.items()]
+    groups += [('images', name, [file]) for name, file in images.items()]
+
+    index = {'sequences': {}, 'images': {}}
+    placed = []
+    x = y = row_height = sheet_width = 0
+
+    for kind, name, files in groups:
+        regions = []
+        x = 0
+        y += row_height
+        row_height = 0
+
+        for file in files:
+            width, height, rows = read_png(file)
+            if x + width > MAX_WIDTH:
+                x = 0
+                y += row_height
+                row_height = 0
+
+            regions.append((x, y, width, height))
+            placed.append((x, y, width, rows))
+
+            x += width
+            row_height = max(row_height, height)
+            sheet_width = max(sheet_width, x)
+
+        index[kind][name] = regions if kind == 'sequences' else regions[0]
+
+    sheet_height = y + row_height
+    sheet = [bytearray(sheet_width * PIXEL_BYTES) for _ in range(sheet_height)]
+
+    for x, y, width, rows in placed:
+        start = x * PIXEL_BYTES
+        for offset, row in enumerate(rows):
+            sheet[y + offset][start:start + width * PIXEL_BYTES] = row
+
+    os.makedirs(ATLAS_DIR, exist_ok=True)
+    write_png(f'{ATLAS_DIR}/{theme}.png', sheet_width, sheet_height, sheet)
+
+    with open(f'{ATLAS_DIR}/{theme}.json', 'w') as file:
+        json.dump(index, file)
+
+    return len(placed)
+
+
+class SpriteSheet:
+    '''
+    Frames of a theme cut out of its sprite sheet.\n
+    The sheet is decoded once, on the first request, and every frame is copied
+    from a region of it instead of being read from its own file. The images
+    belong to the Tk interpreter of 'master', the default root without one.
+    '''
+    def __init__(self, theme: str, master: tk.Misc = None):
+        self.theme = theme
+        self.master = master
+        self.image = None
+
+        with open(f'{ATLAS_DIR}/{theme}.json') as file:
+            index = json.load(file)
+
+        self.sequences = index['sequences']
+        self.images = index['images']
+
+
+    def cut(self, region: list[int], image: tk.PhotoImage = None) -> tk.PhotoImage:
+        '''Returns a copy of a region of the sheet, drawn on the given image if there is one.'''
+        if self.image is None:
+            self.image = tk.PhotoImage(master=self.master, file=f'{ATLAS_DIR}/{self.theme}.png')
+
+        x, y, width, height = region
+        if image is None:
+            image = tk.PhotoImage(master=self.master, width=width, height=height)
+
+        # PhotoImage.copy( ) can't copy a region before Python 3.13
+        image.tk.call(image, 'copy', self.image, '-from', x, y, x + width, y + height)
+        return image
+
+
+    def frames(self, sequence: str) -> list[tk.PhotoImage]:
+        return [self.cut(region) for region in self.sequences[sequence]]
+
+
+# sheets by theme for every Tk interpreter, None when the theme has no atlas,
+# images can't be shared between interpreters
+_sheets = {}
+
+
+def get_sheet(theme: str, master: tk.Misc = None) -> SpriteSheet | None:
+    '''Returns the sprite sheet of the theme for the interpreter of 'master', None if it was not built.'''
+    sheets = _sheets.setdefault(master.tk if master else None, {})
+
+    if theme not in sheets:
+        sheets[theme] = SpriteSheet(theme, master) if os.path.exists(f'{ATLAS_DIR}/{theme}.json') else None
+    return sheets[theme]
+
+
+def drop_sheets(master: tk.Misc):
+    '''Forgets the sheets of the interpreter of 'master', once its window is destroyed.'''
+    _sheets.pop(master.tk, None)
+
+
+def load_sequence(directory: str, master: tk.Misc = None) -> list[tk.PhotoImage] | None:
+    '''Returns the frames of a sprite directory cut from its atlas, None if the atlas doesn't have them.'''
+    if not directory.startswith(SPRITE_DIR + '/'):
+        return None
+
+    theme, _, sequence = directory[len(SPRITE_DIR)+1:].partition('/')
+    sheet = get_sheet(theme, master)
+
+    if sheet is None or sequence not in sheet.sequences:
+        return None
+    return sheet.frames(sequence)
+
+
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Packs the sprites of each theme into a sprite sheet.')
+    parser.add_argument('themes', nargs='*', help='theme directories in assets/sprites, all of them by default')
+    args = parser.parse_args()
+
+    for theme in args.themes or sorted(os.listdir(SPRITE_DIR)):
+        count = build_atlas(theme)
+        print(f'{theme}: {count} images packed into {ATLAS_DIR}/{theme}.png')
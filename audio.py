@@ -0,0 +1,154 @@
+import os
+import queue
+import threading
+import wave
+
+try:
+    import simpleaudio
+except ImportError:
+    simpleaudio = None
+
+try:
+    import winsound
+except ImportError:
+    winsound = None
+
+try:
+    from playsound import playsound
+except ImportError:
+    playsound = None
+
+
+SOUND_DIR = 'assets/sound'
+
+# sounds played by the game
+SOUNDS = ('click1', 'click2', 'click3', 'crown', 'rattle')
+
+# sounds that can wait for a free voice of a backend with several voices, newer ones are dropped
+QUEUE_SIZE = 4
+
+
+class Sound:
+    '''Contents of a wav file, read once.'''
+    def __init__(self, path: str):
+        self.path = path
+
+        with open(path, 'rb') as file:
+            self.data = file.read()
+
+        with wave.open(path, 'rb') as file:
+            self.channels = file.getnchannels()
+            self.sample_width = file.getsampwidth()
+            self.rate = file.getframerate()
+            self.frames = file.readframes(file.getnframes())
+
+
+class SilentBackend:
+    '''Plays nothing, for headless runs and machines without audio.'''
+    voices = 1
+
+    def play(self, sound: Sound):
+        pass
+
+
+class SimpleAudioBackend:
+    '''Plays the decoded samples from memory with simpleaudio, which mixes several voices.'''
+    voices = 3
+
+    def play(self, sound: Sound):
+        simpleaudio.play_buffer(sound.frames, sound.channels, sound.sample_width, sound.rate).wait_done()
+
+
+class WinsoundBackend:
+    '''Plays the wav data from memory with winsound, one sound at a time.'''
+    voices = 1
+
+    def play(self, sound: Sound):
+        winsound.PlaySound(sound.data, winsound.SND_MEMORY | winsound.SND_NODEFAULT)
+
+
+class PlaysoundBackend:
+    '''Plays the files with playsound, used when no backend can play from memory.'''
+    voices = 2
+
+    def play(self, sound: Sound):
+        playsound(sound.path, block=True)
+
+
+def default_backend():
+    '''Returns the best backend available on this machine.'''
+    if simpleaudio:
+        return SimpleAudioBackend()
+    if winsound:
+        return WinsoundBackend()
+    if playsound:
+        return PlaysoundBackend()
+    return SilentBackend()
+
+
+class AudioEngine:
+    '''
+    Plays the game sounds without blocking the caller.\n
+    The wav files are read once. A fixed set of threads, one per voice of the
+    backend, plays the sounds from a bounded queue, and a sound that finds the
+    queue full is dropped, so rapid clicks never stall the window or start
+    new threads. A backend with a single voice doesn't queue, a sound that
+    can't start right away is dropped instead of playing late.\n
+    Arguments:
+        backend
+            object with a play(sound) method that blocks until the sound ends\n
+            the best available backend by default, SilentBackend( ) to mute the game
+    '''
+    def __init__(self, backend = None, directory: str = SOUND_DIR):
+        self.backend = backend or default_backend()
+        self.sounds = {}
+
+        if not isinstance(self.backend, SilentBackend):
+            for name in SOUNDS:
+                path = f'{directory}/{name}.wav'
+                if os.path.exists(path):
+                    self.sounds[name] = Sound(path)
+
+        self.jobs = queue.Queue(QUEUE_SIZE)
+        self.dropped = 0
+
+        # taken while the only voice of the backend plays a sound
+        self.busy = threading.Lock() if self.backend.voices == 1 else None
+
+        self.threads = [threading.Thread(target=self._run, daemon=True) for _ in range(self.backend.voices)]
+        for thread in self.threads:
+            thread.start()
+
+
+    def play(self, name: str):
+        '''Starts playing a sound, returns immediately.'''
+        if (sound := self.sounds.get(name)) is None:
+            return
+
+        if self.busy and not self.busy.acquire(blocking=False):
+            self.dropped += 1
+            return
+
+        try:
+            self.jobs.put_nowait(sound)
+        except queue.Full:
+            self.dropped += 1
+
+
+    def close(self):
+        '''Stops the threads once the queued sounds end.'''
+        for _ in self.threads:
+            self.jobs.put(None)
+
+
+    def _run(self):
+        '''Plays the queued sounds in a voice thread.'''
+        while (sound := self.jobs.get()) is not None:
+            try:
+                self.backend.play(sound)
+            except Exception:
+                # a broken audio device must not stop the game
+                pass
+
+            if self.busy:
+                self.busy.release()
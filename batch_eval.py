@@ -0,0 +1,124 @@
+import numpy as np
+from bitboard import Board, BOTTOM_MASK, BOARD_MASK, COLUMNS, HEIGHT, ROWS, bit_index, column_mask
+from threats import WINDOW_BITS, WINDOW_SCORES
+from bot import MOVE_ORDER
+
+
+BITS = COLUMNS * HEIGHT
+
+# value of every bit of the board
+POWERS = np.left_shift(np.uint64(1), np.arange(BITS, dtype=np.uint64))
+
+# bit of each slot of a (6, 7) grid, read row by row
+GRID_BITS = np.array([bit_index(row, col) for row in range(ROWS) for col in range(COLUMNS)])
+
+# 1 where a slot (row) belongs to a line of four (column)
+# float matrices use the fast matrix product, the counts stay exact
+INCIDENCE = np.zeros((BITS, len(WINDOW_BITS)), dtype=np.float32)
+for window, bits in enumerate(WINDOW_BITS):
+    INCIDENCE[list(bits), window] = 1
+
+SCORES = np.array(WINDOW_SCORES, dtype=np.int32)
+
+COLUMN_MASKS = tuple(np.uint64(column_mask(col)) for col in range(COLUMNS))
+
+
+class BatchEvaluation:
+    '''
+    Heuristic of many boards, computed at once.\n
+    Every array has the boards in its first axis:
+        counts
+            (N, 2, 69) pieces of red and orange in every line of four\n
+        score
+            (N,) open lines of red minus open lines of orange, the score of ThreatMap\n
+        winner
+            (N,) 1 or 2 if that player has four aligned pieces, 0 otherwise\n
+        playable
+            (N,) mask of the slot each column would receive next\n
+        weak, strong
+            (N, 2) masks of the empty slots that extend a line of two or complete a line of three
+    '''
+    def __init__(self, occupancy: np.ndarray):
+        counts = (occupancy @ INCIDENCE).astype(np.int16)
+        red, orange = counts[:, 0], counts[:, 1]
+
+        self.counts = counts
+        self.score = ((SCORES[red] * (orange == 0)).sum(axis=1)
+                      - (SCORES[orange] * (red == 0)).sum(axis=1)).astype(np.int32)
+
+        self.winner = np.zeros(len(counts), dtype=np.int8)
+        self.winner[(orange == 4).any(axis=1)] = 2
+        self.winner[(red == 4).any(axis=1)] = 1
+
+        occupied = occupancy[:, 0] + occupancy[:, 1]
+        occupied_mask = _to_masks(occupied)
+        self.playable = (occupied_mask + np.uint64(BOTTOM_MASK)) & np.uint64(BOARD_MASK)
+
+        empty = occupied == 0
+        self.weak = np.empty((len(counts), 2), dtype=np.uint64)
+        self.strong = np.empty((len(counts), 2), dtype=np.uint64)
+
+        for player, (own, other) in enumerate(((red, orange), (orange, red))):
+            for level, target in ((2, self.weak), (3, self.strong)):
+                windows = ((own == level) & (other == 0)).astype(np.float32)
+                cells = ((windows @ INCIDENCE.T) > 0) & empty
+                target[:, player] = _to_masks(cells)
+
+
+    def __len__(self) -> int:
+        return len(self.score)
+
+
+    def heuristic_moves(self, player: int) -> np.ndarray:
+        '''
+        Returns the column the one move bot heuristic plays for the player on every board.\n
+        Boards without a free column get -1.
+        '''
+        ally, enemy = player - 1, 2 - player
+        moves = np.full(len(self), -1, dtype=np.int8)
+        pending = np.ones(len(self), dtype=bool)
+
+        for candidates in (self.strong[:, ally], self.strong[:, enemy],
+                           self.weak[:, ally], self.weak[:, enemy], self.playable):
+            cells = candidates & self.playable
+
+            for col in MOVE_ORDER:
+                found = pending & ((cells & COLUMN_MASKS[col]) != 0)
+                moves[found] = col
+                pending &= ~found
+
+        return moves
+
+
+def _to_masks(cells: np.ndarray) -> np.ndarray:
+    '''Returns the (N,) masks of a (N, bits) array of slots.'''
+    return (cells.astype(np.uint64) * POWERS).sum(axis=1, dtype=np.uint64)
+
+
+def evaluate_bitboards(masks: np.ndarray) -> BatchEvaluation:
+    '''Evaluates an (N, 2) uint64 array with the red and orange masks of every board.'''
+    masks = np.asarray(masks, dtype=np.uint64)
+    if masks.ndim != 2 or masks.shape[1] != 2:
+        raise ValueError(f'expected an (N, 2) array of masks, got shape {masks.shape}')
+
+    occupancy = ((masks[:, :, None] >> np.arange(BITS, dtype=np.uint64)) & np.uint64(1)).astype(np.float32)
+    return BatchEvaluation(occupancy)
+
+
+def evaluate_grids(grids: np.ndarray) -> BatchEvaluation:
+    '''Evaluates an (N, 6, 7) array with the player that owns each slot, 0 for empty slots.'''
+    grids = np.asarray(grids, dtype=np.int8)
+    if grids.ndim != 3 or grids.shape[1:] != (ROWS, COLUMNS):
+        raise ValueError(f'expected an (N, {ROWS}, {COLUMNS}) array of grids, got shape {grids.shape}')
+
+    flat = grids.reshape(len(grids), ROWS * COLUMNS)
+    occupancy = np.zeros((len(grids), 2, BITS), dtype=np.float32)
+    occupancy[:, 0, GRID_BITS] = flat == 1
+    occupancy[:, 1, GRID_BITS] = flat == 2
+
+    return BatchEvaluation(occupancy)
+
+
+def to_bitboards(boards: list[Board]) -> np.ndarray:
+    '''Returns the (N, 2) masks of the boards.'''
+    return np.array([board.masks for board in boards], dtype=np.uint64)
@@ -0,0 +1,282 @@
+import json
+import platform
+import random
+import statistics
+from time import perf_counter
+from logic import Logic
+from bot import Bot
+from bitboard import Board
+from win_search import find_winner
+from scaling import POSITIONS, create_board
+
+
+# games replayed by the engine benchmarks, played at random from a fixed seed
+GAMES = 200
+SEED = 0
+
+# times each rate is measured, the best run is kept
+REPEATS = 5
+
+# seconds each run lasts at least, short runs are mostly timer and scheduler noise
+MIN_TIME = 0.5
+
+# search depth of the nodes per second benchmark
+SEARCH_DEPTH = 7
+
+# depth of the bot timed by the search latency benchmark, and the games its positions come from
+LATENCY_DEPTH = 5
+LATENCY_GAMES = 10
+
+# table of each bot of the search latency benchmark, small enough that its allocation doesn't hide the search
+LATENCY_TABLE_BYTES = 256 * 1024
+
+# metrics where a smaller value is better, every other metric is a rate
+LOWER_IS_BETTER = ('make_move_p50_ms', 'make_move_p90_ms', 'make_move_p99_ms',
+                   'search_move_p50_ms', 'search_move_p90_ms', 'search_move_p99_ms')
+
+# default slowdown allowed before a metric counts as a regression
+THRESHOLD = 0.15
+
+
+def random_games(count: int = GAMES, seed: int = SEED) -> list[list[int]]:
+    '''Returns the columns of random games that are played until a win or a full board.'''
+    rng = random.Random(seed)
+    games = []
+
+    for _ in range(count):
+        board = Board()
+        player = 1
+        moves = []
+
+        while board.legal_moves():
+            row, col = board.play(rng.choice(board.legal_moves()), player)
+            moves.append(col)
+
+            if find_winner(board, row, col):
+                break
+            player = 1 if player == 2 else 2
+
+        games.append(moves)
+
+    return games
+
+
+def _best_rate(function, amount: int) -> float:
+    '''
+    Returns the highest amount per second of the runs of the function.\n
+    Every run calls the function until MIN_TIME has passed.
+    '''
+    best = 0.0
+    for _ in range(REPEATS):
+        calls = 0
+        start = perf_counter()
+        while True:
+            function()
+            calls += 1
+            elapsed = perf_counter() - start
+            if elapsed >= MIN_TIME:
+                break
+        best = max(best, calls * amount / elapsed)
+    return best
+
+
+def bench_logic(games: list[list[int]]) -> dict:
+    '''Measures the moves per second of the game logic, as played by main.py.'''
+    logic = Logic()
+    moves = sum(len(game) for game in games)
+
+    def replay():
+        for game in games:
+            logic.board.reset()
+            logic.move_count = 0
+            for col in game:
+                pos = logic.find_bottom((0, col))
+                logic.update_slot(pos)
+                logic.next_turn()
+
+    return {'logic_moves_per_sec': _best_rate(replay, moves)}
+
+
+def bench_find_winner(games: list[list[int]]) -> dict:
+    '''Measures the win checks per second, one check after every move of the games.'''
+    positions = []
+    for game in games:
+        board = Board()
+        player = 1
+        for col in game:
+            row, col = board.play(col, player)
+            positions.append((board.copy(), row, col))
+            player = 1 if player == 2 else 2
+
+    def check():
+        for board, row, col in positions:
+            find_winner(board, row, col)
+
+    return {'win_checks_per_sec': _best_rate(check, len(positions))}
+
+
+def _percentiles(name: str, times: list[float]) -> dict:
+    '''Returns the 50th, 90th and 99th percentiles of the times.'''
+    times = sorted(times)
+
+    def percentile(rate: float) -> float:
+        return times[min(len(times) - 1, int(rate * len(times)))]
+
+    return {f'{name}_p50_ms': percentile(0.5),
+            f'{name}_p90_ms': percentile(0.9),
+            f'{name}_p99_ms': percentile(0.99)}
+
+
+def bench_make_move(games: list[list[int]]) -> dict:
+    '''
+    Measures the latency percentiles of the heuristic bot along the games.\n
+    Every game gets a new bot for each player, which answers every position of
+    its player like in a real game, so each move pays for the pieces added
+    since the previous one.\n
+    The games are replayed REPEATS times and the best time of each move is
+    kept, a single move is too short to time once.
+    '''
+    times = []
+
+    for game in games:
+        best = [float('inf')] * len(game)
+
+        for _ in range(REPEATS):
+            board = Board()
+            bots = {1: Bot(player=1), 2: Bot(player=2)}
+            player = 1
+
+            for index, col in enumerate(game):
+                start = perf_counter()
+                bots[player].make_move(board)
+                best[index] = min(best[index], (perf_counter() - start) * 1000)
+
+                board.play(col, player)
+                player = 1 if player == 2 else 2
+
+        times.extend(best)
+
+    return _percentiles('make_move', times)
+
+
+def bench_search_move(games: list[list[int]], depth: int = LATENCY_DEPTH) -> dict:
+    '''
+    Measures the latency percentiles of a bot searching 'depth' moves ahead.\n
+    Every position of the games is answered by a new bot, so no search starts
+    from the table of a previous one.
+    '''
+    times = []
+
+    for game in games:
+        board = Board()
+        player = 1
+
+        for col in game:
+            bot = Bot(depth=depth, player=player, tt_bytes=LATENCY_TABLE_BYTES)
+
+            start = perf_counter()
+            bot.make_move(board)
+            times.append((perf_counter() - start) * 1000)
+
+            board.play(col, player)
+            player = 1 if player == 2 else 2
+
+    return _percentiles('search_move', times)
+
+
+def bench_search(depth: int = SEARCH_DEPTH) -> dict:
+    '''Measures the nodes per second of the negamax search on the positions of scaling.py.'''
+    nodes = 0
+    elapsed = 0.0
+
+    for moves in POSITIONS:
+        board, player = create_board(moves)
+        bot = Bot(depth=depth, player=player)
+
+        start = perf_counter()
+        bot.search(board)
+        elapsed += perf_counter() - start
+        nodes += bot.nodes
+
+    return {'search_nodes_per_sec': nodes / elapsed if elapsed else 0.0}
+
+
+def run_benchmarks() -> dict:
+    '''Runs every benchmark and returns the metrics with a description of the machine.'''
+    games = random_games()
+
+    metrics = {}
+    metrics.update(bench_logic(games))
+    metrics.update(bench_find_winner(games))
+    metrics.update(bench_make_move(games))
+    metrics.update(bench_search_move(games[:LATENCY_GAMES]))
+    metrics.update(bench_search())
+
+    return {'python': platform.python_version(),
+            'machine': platform.machine(),
+            'metrics': metrics}
+
+
+def median_results(runs: list[dict]) -> dict:
+    '''Returns the results of the first run with the median of every metric across the runs.'''
+    results = dict(runs[0])
+    results['metrics'] = {name: statistics.median(run['metrics'][name] for run in runs)
+                          for name in runs[0]['metrics']}
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float = THRESHOLD) -> list[tuple[str, float, float, float]]:
+    '''
+    Returns the (metric, baseline, current, change) of every metric that got
+    worse than the baseline by more than the threshold.\n
+    The change is the fraction lost, 0.2 means 20% slower.
+    '''
+    regressions = []
+
+    for name, old in baseline['metrics'].items():
+        new = results['metrics'].get(name)
+        if new is None or not old:
+            continue
+
+        if name in LOWER_IS_BETTER:
+            change = (new - old) / old
+        else:
+            change = (old - new) / old
+
+        if change > threshold:
+            regressions.append((name, old, new, change))
+
+    return regressions
+
+
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Measures the speed of the engine and compares it with a baseline.')
+    parser.add_argument('--output', default=None, help='file the results are written to')
+    parser.add_argument('--baseline', default=None, help='results of a previous run to compare with')
+    parser.add_argument('--runs', type=int, default=1,
+                        help='times every benchmark runs, the median is kept, a few runs keep a noisy machine from looking like a regression')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD, help='slowdown allowed, 0.15 is 15%%')
+    args = parser.parse_args()
+
+    results = median_results([run_benchmarks() for _ in range(args.runs)])
+
+    for name, value in results['metrics'].items():
+        print(f'{name:<24}{value:>16,.3f}')
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=4)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold)
+
+        for name, old, new, change in regressions:
+            print(f'regression: {name} {old:,.3f} -> {new:,.3f} ({change:.1%} worse)')
+
+        if regressions:
+            raise SystemExit(1)
@@ -0,0 +1,207 @@
+ROWS = 6
+COLUMNS = 7
+
+# each column uses 7 bits, the extra bit on top of every column is always empty
+# so pieces in different columns never line up when the masks are shifted
+HEIGHT = ROWS + 1
+
+# one bit at the bottom of every column
+BOTTOM_MASK = sum(1 << (col * HEIGHT) for col in range(COLUMNS))
+
+# every playable bit of the board
+BOARD_MASK = BOTTOM_MASK * ((1 << ROWS) - 1)
+
+
+def bit_index(row: int, col: int) -> int:
+    '''Returns the index of the bit that stores the slot at the given screen coordinates.'''
+    return col * HEIGHT + (ROWS - 1 - row)
+
+
+def bit_to_pos(bit: int) -> tuple[int, int]:
+    '''Returns the screen coordinates of the slot stored in the given bit.'''
+    col, height = divmod(bit, HEIGHT)
+    return (ROWS - 1 - height, col)
+
+
+def column_mask(col: int) -> int:
+    '''Returns a mask with every playable bit of the column.'''
+    return ((1 << ROWS) - 1) << (col * HEIGHT)
+
+
+def possible_moves(occupied: int) -> int:
+    '''Returns a mask with the slot every non-full column would receive next.'''
+    return (occupied + BOTTOM_MASK) & BOARD_MASK
+
+
+def winning_cells(mask: int, occupied: int) -> int:
+    '''Returns a mask with the empty slots that would complete four for the pieces in the mask.'''
+    # vertical
+    cells = (mask << 1) & (mask << 2) & (mask << 3)
+
+    # horizontal, diagonal and anti-diagonal
+    for shift in (HEIGHT, HEIGHT + 1, HEIGHT - 1):
+        pair = (mask << shift) & (mask << 2 * shift)
+        cells |= pair & (mask << 3 * shift)
+        cells |= pair & (mask >> shift)
+        pair = (mask >> shift) & (mask >> 2 * shift)
+        cells |= pair & (mask << shift)
+        cells |= pair & (mask >> 3 * shift)
+
+    return cells & (BOARD_MASK ^ occupied)
+
+
+def mirror(mask: int) -> int:
+    '''Returns the mask reflected from left to right.'''
+    column_bits = (1 << HEIGHT) - 1
+    mirrored = 0
+    for col in range(COLUMNS):
+        mirrored |= ((mask >> (col * HEIGHT)) & column_bits) << ((COLUMNS - 1 - col) * HEIGHT)
+    return mirrored
+
+
+def canonical(key: int) -> tuple[int, bool]:
+    '''Returns the smallest key between a position and its reflection and whether it was reflected.'''
+    reflected = mirror(key)
+    if reflected < key:
+        return reflected, True
+    return key, False
+
+
+def has_four(mask: int) -> bool:
+    '''Returns True if the given mask has four aligned pieces, returns False otherwise.'''
+    # horizontal, vertical, diagonal and anti-diagonal shifts
+    for shift in (HEIGHT, 1, HEIGHT + 1, HEIGHT - 1):
+        pairs = mask & (mask >> shift)
+        if pairs & (pairs >> (2 * shift)):
+            return True
+    return False
+
+
+class Board:
+    '''
+    Bitboard representation of the game grid.\n
+    The pieces of each player are stored in a separate integer mask and the
+    amount of pieces in every column is kept in 'heights', so playing, undoing
+    and checking a column are constant time operations.
+    '''
+    __slots__ = ('masks', 'heights', 'moves')
+
+    def __init__(self):
+        # masks[0] holds the red pieces, masks[1] holds the orange pieces
+        self.masks = [0, 0]
+        self.heights = [0] * COLUMNS
+        self.moves = []
+
+
+    def reset(self):
+        '''Removes every piece from the board.'''
+        self.masks = [0, 0]
+        self.heights = [0] * COLUMNS
+        self.moves = []
+
+
+    def copy(self) -> 'Board':
+        '''Returns an independent copy of the board.'''
+        board = Board()
+        board.masks = self.masks[:]
+        board.heights = self.heights[:]
+        board.moves = self.moves[:]
+        return board
+
+
+    @property
+    def move_count(self) -> int:
+        return len(self.moves)
+
+
+    @property
+    def occupied(self) -> int:
+        '''Mask with every occupied slot.'''
+        return self.masks[0] | self.masks[1]
+
+
+    def can_play(self, col: int) -> bool:
+        '''Returns True if a piece can be dropped in the specified column.'''
+        return self.heights[col] < ROWS
+
+
+    def is_full(self, col: int) -> bool:
+        '''Returns True if the specified column is full, returns False otherwise.'''
+        return self.heights[col] == ROWS
+
+
+    def legal_moves(self) -> list[int]:
+        '''Returns the columns that can still receive a piece.'''
+        return [col for col in range(COLUMNS) if self.heights[col] < ROWS]
+
+
+    def play(self, col: int, player: int) -> tuple[int, int]:
+        '''Drops a piece of the specified player in the column and returns its screen coordinates.'''
+        height = self.heights[col]
+        self.masks[player-1] |= 1 << (col * HEIGHT + height)
+        self.heights[col] = height + 1
+        self.moves.append(col)
+        return (ROWS - 1 - height, col)
+
+
+    def undo(self) -> int:
+        '''Removes the last piece played and returns its column.'''
+        col = self.moves.pop()
+        height = self.heights[col] - 1
+        self.heights[col] = height
+        bit = ~(1 << (col * HEIGHT + height))
+        self.masks[0] &= bit
+        self.masks[1] &= bit
+        return col
+
+
+    def is_win(self, player: int) -> bool:
+        '''Returns True if the specified player has four aligned pieces.'''
+        return has_four(self.masks[player-1])
+
+
+    def is_winning_move(self, col: int, player: int) -> bool:
+        '''Returns True if dropping a piece of the player in the column connects four.'''
+        return has_four(self.masks[player-1] | (1 << (col * HEIGHT + self.heights[col])))
+
+
+    def player_at(self, row: int, col: int) -> int:
+        '''Returns the player that owns the slot at the given screen coordinates, 0 if it is empty.'''
+        bit = 1 << bit_index(row, col)
+        if self.masks[0] & bit:
+            return 1
+        if self.masks[1] & bit:
+            return 2
+        return 0
+
+
+    def bottom(self, col: int) -> tuple[int, int] | None:
+        '''Returns the screen coordinates of the slot a piece would fall to, None if the column is full.'''
+        height = self.heights[col]
+        if height == ROWS:
+            return None
+        return (ROWS - 1 - height, col)
+
+
+    def key(self) -> int:
+        '''Returns an integer that uniquely identifies the position.'''
+        return self.masks[0] + self.occupied + BOTTOM_MASK
+
+
+    def grid(self) -> list[list[int]]:
+        '''Returns a 6x7 list with the player that owns each slot.'''
+        return [[self.player_at(row, col) for col in range(COLUMNS)] for row in range(ROWS)]
+
+
+class GridView:
+    '''Read-only row/col view of a board for code that works with screen coordinates.'''
+    __slots__ = ('board',)
+
+    def __init__(self, board: Board):
+        self.board = board
+
+    def __len__(self) -> int:
+        return ROWS
+
+    def __getitem__(self, row: int) -> list[int]:
+        return [self.board.player_at(row, col) for col in range(COLUMNS)]
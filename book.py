@@ -0,0 +1,218 @@
+import mmap
+import os
+import struct
+from bitboard import Board, BOTTOM_MASK, canonical
+from solver import Solver, MOVE_ORDER, SLOTS
+
+
+MAGIC = b'C4BK'
+VERSION = 1
+
+# magic, version, moves of the deepest position, amount of records
+HEADER = struct.Struct('<4sBB2xQ')
+
+# every record is one integer: position key (50 bits) | score + 32 (6 bits) | column (3 bits)
+RECORD = struct.Struct('<Q')
+
+# position key and score of a position solved by build_book( ), kept while the book is built
+CHECKPOINT_RECORD = struct.Struct('<Qb')
+
+
+def position_key(board: Board, player: int) -> int:
+    '''Returns the key of the position for the player to move.'''
+    return board.masks[player-1] + board.occupied + BOTTOM_MASK
+
+
+class OpeningBook:
+    '''
+    Read-only view of a book file created with build_book( ).\n
+    The file is memory mapped and searched in place, so opening it costs no
+    parsing and the records stay out of the Python heap.
+    '''
+    def __init__(self, path: str):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.depth, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'{path} is not a version {VERSION} opening book')
+
+
+    def __len__(self) -> int:
+        return self.count
+
+
+    def close(self):
+        '''Releases the file.'''
+        self.data.close()
+        self.file.close()
+
+
+    def lookup(self, board: Board, player: int) -> tuple[int, int] | None:
+        '''Returns the (score, column) of the position for the player to move, None if it is not in the book.'''
+        if board.move_count > self.depth:
+            return None
+
+        key, reflected = canonical(position_key(board, player))
+
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            record = RECORD.unpack_from(self.data, HEADER.size + middle * RECORD.size)[0]
+            stored = record >> 9
+
+            if stored < key:
+                low = middle + 1
+            elif stored > key:
+                high = middle
+            else:
+                score = ((record >> 3) & 0x3f) - 32
+                col = record & 0x7
+                return score, (6 - col if reflected else col)
+
+        return None
+
+
+def _read_checkpoint(path: str) -> dict[int, int]:
+    '''Returns the scores already solved by an interrupted build, by canonical key.'''
+    scores = {}
+    if not os.path.exists(path):
+        return scores
+
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    # a build stopped while writing leaves part of a record at the end, new records go after the complete ones
+    usable = len(data) - len(data) % CHECKPOINT_RECORD.size
+    if usable < len(data):
+        os.truncate(path, usable)
+
+    for key, score in CHECKPOINT_RECORD.iter_unpack(data[:usable]):
+        scores[key] = score
+    return scores
+
+
+def build_book(path: str, depth: int, solver: Solver = None, progress = None, moves: list[int] = ()) -> int:
+    '''
+    Writes the scores and best moves of every position reachable in up to 'depth' moves to a book file.\n
+    The book starts from the empty board, or from the position after the
+    columns in 'moves'. Only the positions one move past the book are solved,
+    the positions of the book are scored from the scores of their children,
+    so each position is solved once. Reflected positions are stored once.
+    Returns the amount of records written.\n
+    The frontier decides the build time. From the empty board a depth 8 book
+    has 269,531 frontier positions that take from a few seconds to minutes
+    each, months in total, and shallower books have fewer but much harder
+    positions. Books that start 10 or more moves into a game build in minutes.\n
+    Every solved position is appended to '{path}.part', a build that is
+    stopped continues from there when it runs again. The file is removed once
+    the book is written.\n
+    'progress' is called with (ply, solved, total) after each solved position.
+    '''
+    solver = solver or Solver()
+    checkpoint = f'{path}.part'
+
+    root = Board()
+    player = 1
+    for col in moves:
+        if not 0 <= col < 7 or not root.can_play(col) or root.is_winning_move(col, player):
+            raise ValueError(f'the moves {list(moves)} are not the start of an unfinished game')
+        root.play(col, player)
+        player = 1 if player == 2 else 2
+
+    # the frontier can't go past a full board
+    depth = min(depth, 41 - root.move_count)
+
+    # boards that can be reached at each ply from the root, by canonical key
+    levels = [{canonical(position_key(root, player))[0]: root}]
+
+    for ply in range(depth + 1):
+        next_level = {}
+        opponent = 1 if player == 2 else 2
+
+        for board in levels[ply].values():
+            for move in board.legal_moves():
+                # games that end here don't continue
+                if board.is_winning_move(move, player):
+                    continue
+                child = board.copy()
+                child.play(move, player)
+                next_level.setdefault(canonical(position_key(child, opponent))[0], child)
+
+        levels.append(next_level)
+        player = opponent
+
+    # exact scores by canonical key, starting with the positions solved by a previous run
+    scores = _read_checkpoint(checkpoint)
+    frontier = levels[depth + 1]
+
+    with open(checkpoint, 'ab') as file:
+        for solved, (key, board) in enumerate(frontier.items(), start=1):
+            if key not in scores:
+                scores[key] = solver.solve(board, player)
+                file.write(CHECKPOINT_RECORD.pack(key, scores[key]))
+                file.flush()
+
+            if progress:
+                progress(root.move_count + depth + 1, solved, len(frontier))
+
+    # negamax from the frontier back to the root
+    records = []
+
+    for ply in range(depth, -1, -1):
+        player = 1 if player == 2 else 2
+        opponent = 1 if player == 2 else 2
+
+        for key, board in levels[ply].items():
+            best_col, best_score = None, None
+
+            for col in MOVE_ORDER:
+                if not board.can_play(col):
+                    continue
+
+                if board.is_winning_move(col, player):
+                    score = (SLOTS + 1 - board.move_count) // 2
+                else:
+                    board.play(col, player)
+                    score = -scores[canonical(position_key(board, opponent))[0]]
+                    board.undo()
+
+                if best_score is None or score > best_score:
+                    best_col, best_score = col, score
+
+            scores[key] = best_score
+
+            # store the move as seen on the canonical board
+            if key != position_key(board, player):
+                best_col = 6 - best_col
+            records.append(key << 9 | (best_score + 32) << 3 | best_col)
+
+    records.sort()
+
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, root.move_count + depth, len(records)))
+        for record in records:
+            file.write(RECORD.pack(record))
+
+    os.remove(checkpoint)
+    return len(records)
+
+
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Builds an opening book of solved positions.')
+    parser.add_argument('path', help='output file')
+    parser.add_argument('--depth', type=int, default=2,
+                        help='amount of moves covered by the book, a stopped build continues from its .part file')
+    parser.add_argument('--moves', default='', help='columns of the opening the book starts from, like 3342')
+    args = parser.parse_args()
+
+    def show_progress(ply: int, solved: int, total: int):
+        print(f'\rply {ply}: {solved}/{total}', end='', flush=True)
+
+    count = build_book(args.path, args.depth, progress=show_progress, moves=[int(col) for col in args.moves])
+    print(f'\n{count} positions written to {args.path}')
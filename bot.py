@@ -1,183 +1,508 @@
-from random import choice
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait
+from time import perf_counter
+from typing import Callable
+from bitboard import Board, HEIGHT, ROWS
+from win_search import is_winning_move
+from threats import ThreatMap
+from transposition import TranspositionTable, EXACT, LOWER, UPPER, NO_MOVE
+from solver import Solver
+from book import OpeningBook
+from experience import PositionDatabase
+from search_stats import SearchStats
+
+
+# columns sorted from the center out, central moves take part in more lines
+MOVE_ORDER = (3, 2, 4, 1, 5, 0, 6)
+
+# score of a win, always larger than any positional evaluation
+WIN_SCORE = 100_000
+
+# amount of nodes searched between deadline checks
+CHECK_INTERVAL = 256
+
+# seconds between deadline checks while waiting for the worker processes
+WAIT_INTERVAL = 0.02
+
+# games a position needs in the position database before its best move is trusted
+EXPERIENCE_VISITS = 8
+
+
+class SearchTimeout(Exception):
+    '''Raised inside the search when the time budget runs out or the search is cancelled.'''
 
 
 class Bot:
-    array = None
-    weighted_board = None
+    '''
+    Computer player.\n
+    Arguments:
+        depth
+            amount of moves to look ahead with the negamax search\n
+            0 plays with the one move weight heuristic, unless a time budget is given
+        player
+            player controlled by the bot, 2 (orange) by default
+        tt_bytes
+            memory budget of the transposition table used by the search
+        book
+            path of an opening book file, positions found in it are played instantly
+        perfect
+            True to play every move with the exact solver, which gets slow on open boards
+        workers
+            processes that search the root moves in parallel, each with its own table
+        experience
+            path of a position database, the best move of positions played often enough is
+            used when no player can win on the next move
+        stats_hook
+            called with the SearchStats of every search, the counters are only kept while it is set
+    '''
+    def __init__(self, depth: int = 0, player: int = 2, tt_bytes: int = 8 * 1024 * 1024,
+                 book: str = None, perfect: bool = False, workers: int = 1, experience: str = None,
+                 stats_hook: Callable[[SearchStats], None] = None):
+        self.depth = depth
+        self.player = player
+        self.opponent = 1 if player == 2 else 2
+
+        # the table is only created once the bot searches
+        self.tt_bytes = tt_bytes
+        self.table = None
+
+        self.deadline = None
+        self.nodes = 0
+
+        # set from another thread to stop the running search
+        self.cancelled = False
+
+        # set by the main process to stop the search of a worker process
+        self.stop_event = None
+
+        # replies searched during the opponent's turn, by position key
+        self.pondered = {}
+
+        # best line of play found by the last completed search depth
+        self.principal_variation = []
+
+        # counters of the running or last search, None without a hook
+        self.stats_hook = stats_hook
+        self.stats = None
+
+        # lines of four of both players, kept in step with the game between moves
+        self.threats = ThreatMap()
+
+        # lighter map that only keeps the score, played and undone by the search
+        self.search_map = ThreatMap(track_cells=False)
+
+        self.book = OpeningBook(book) if book else None
+        self.solver = Solver(tt_bytes) if perfect else None
+        self.experience = PositionDatabase(experience) if experience else None
+
+        # the pool is only started once the bot searches
+        self.workers = workers
+        self.executor = None
+
+        # stops the searches running in the worker processes
+        self.worker_stop = None
+
+
+    def make_move(self, board:Board, time_budget_ms:int = None) -> tuple[int, int]:
+        '''
+        Returns the best valid move to play.\n
+        With a time budget the search deepens until the budget runs out and
+        returns the best move of the last completed depth.
+        '''
+        if self.book and (entry := self.book.lookup(board, self.player)):
+            return board.bottom(entry[1])
+
+        if self.experience and (col := self._get_experience_move(board)) is not None:
+            return board.bottom(col)
+
+        if self.solver:
+            return board.bottom(self.solver.best_move(board.copy(), self.player)[0])
+
+        if self.depth > 0 or time_budget_ms is not None:
+            col = self.pondered.pop(board.key(), None)
+            if col is None or not board.can_play(col):
+                col = self.search(board, time_budget_ms)
+            return board.bottom(col)
+
+        self.threats.sync(board)
+
+        weak_atk, strong_atk = self._get_weighted_pos(board, self.player)
+        weak_def, strong_def = self._get_weighted_pos(board, self.opponent)
+
+        # the first column found is the one closest to the center
+        for moves in (strong_atk, strong_def, weak_atk, weak_def):
+            if moves:
+                return board.bottom(moves[0])
+
+        return board.bottom([col for col in MOVE_ORDER if board.can_play(col)][0])
+
+
+    def _get_experience_move(self, board:Board) -> int | None:
+        '''Returns the best move of the position database, None if it can't be trusted.'''
+        entry = self.experience.lookup(board, self.player)
+        if entry is None or entry[0] < EXPERIENCE_VISITS or not board.can_play(entry[4]):
+            return None
+
+        # games only sample the position, immediate wins and blocks come first
+        for col in board.legal_moves():
+            if board.is_winning_move(col, self.player) or board.is_winning_move(col, self.opponent):
+                return None
 
+        return entry[4]
 
-    def _set_default(self, game_array:list[list]):
-        '''Redefines the lists.'''
-        self.array = game_array
-        self.weighted_board = [[0 for col in range(7)] for row in range(6)]
 
+    def _get_weighted_pos(self, board:Board, player:int) -> tuple[list[int], list[int]]:
+        '''
+        Returns the playable columns that extend a line of the player, separated by their weights.\n
+        Weak columns add a third piece to a line of four, strong columns complete it.
+        '''
+        weak_cells, strong_cells = self.threats.threats(player)
 
-    def _get_board_weight(self, player:int):
-        '''Adds weight to the slots and registers the weights in the 'weighted_board' attribute.'''
-        positions = self._get_piece(player)
+        weak = list()
+        strong = list()
 
-        for pos in positions:
-            self._directions(pos, player)
+        for col in MOVE_ORDER:
+            height = board.heights[col]
+            if height == ROWS:
+                continue
 
+            bit = col * HEIGHT + height
+            if bit in strong_cells:
+                strong.append(col)
+            elif bit in weak_cells:
+                weak.append(col)
 
-    def _get_piece(self, player:int) -> list[tuple[int, int]]:
-        '''Returns the position of every piece of the specified player.'''
-        pos = []
+        return (weak, strong)
 
-        for row in range(6):
-            for col in range(7):
-                if self.array[row][col].player == player:
-                    pos.append((row,col))
-                    
-        return pos
+    # search
+    def search(self, board:Board, time_budget_ms:int = None) -> int:
+        '''
+        Returns the column with the best negamax score for the bot.\n
+        The search deepens one move at a time up to 'depth' (or until the board
+        is full when depth is 0), searching the previous best line first.
+        '''
+        start = perf_counter()
+        stats = self.stats = SearchStats() if self.stats_hook else None
+        self.nodes = 0
+
+        # an interrupted search leaves pieces on the board, so it works on a copy
+        board = board.copy()
+        moves = [col for col in MOVE_ORDER if board.can_play(col)]
+
+        for col in moves:
+            if is_winning_move(board, col, self.player):
+                self.principal_variation = [col]
+                if stats:
+                    stats.add_iteration(1, perf_counter() - start, 0, WIN_SCORE - board.move_count, col, [col])
+                    self._report_stats(start)
+                return col
+
+        if self.table is None:
+            self.table = TranspositionTable(self.tt_bytes)
+        self.table.new_search()
+
+        # the table counts its own probes, the stats keep the difference
+        table_hits, table_misses = self.table.hits, self.table.misses
+
+        self.deadline = None
+
+        self.search_map.sync(board)
+        root_length = len(self.search_map.moves)
+
+        max_depth = self.depth if self.depth > 0 else 42 - board.move_count
+        best_col = moves[0]
+
+        for depth in range(1, max_depth+1):
+            iteration_start = perf_counter()
+            iteration_nodes = self.nodes
+
+            try:
+                if self.workers > 1:
+                    best_col, score = self._search_root_parallel(board, moves, depth)
+                else:
+                    best_col, score = self._search_root(board, moves, depth)
+            except SearchTimeout:
+                self.search_map.truncate(root_length)
+                if stats:
+                    stats.timed_out = True
+                break
 
+            self.principal_variation = self._get_principal_variation(board, best_col)
 
-    def _directions(self, pos:tuple[int, int], player:int):
-        '''Searches for every direction from the given position.'''
-        x, y = pos[0], pos[1]
-        self._set_weight([(x-i,y) for i in range(1,4) if self._in_bounds(x-i,y)], player) # up
-        self._set_weight([(x,y+i) for i in range(1,4) if self._in_bounds(x,y+i)], player) # right
-        self._set_weight([(x,y-i) for i in range(1,4) if self._in_bounds(x,y-i)], player) # left
-        self._set_weight([(x-i,y+i) for i in range(1,4) if self._in_bounds(x-i,y+i)], player) # up right
-        self._set_weight([(x-i,y-i) for i in range(1,4) if self._in_bounds(x-i,y-i)], player) # up left
-        self._set_weight([(x+i,y+i) for i in range(1,4) if self._in_bounds(x+i,y+i)], player) # down right
-        self._set_weight([(x+i,y-i) for i in range(1,4) if self._in_bounds(x+i,y-i)], player) # down left
+            if stats:
+                stats.add_iteration(depth, perf_counter() - iteration_start, self.nodes - iteration_nodes,
+                                    score, best_col, self.principal_variation)
 
+            # the best move of this depth is searched first in the next one
+            moves.remove(best_col)
+            moves.insert(0, best_col)
 
-    def _set_weight(self, line:list[tuple[int, int]], player:int):
-        '''Registers the weight in the 'weighted_board' attribute.'''
-        weighted = list()
+            if abs(score) > WIN_SCORE - 43:
+                break
 
-        can_complete = self._get_individual_weight(line, weighted, player)
+            # the first depth always completes, deeper ones stop at the deadline
+            if time_budget_ms is not None:
+                budget = time_budget_ms / 1000
+                self.deadline = start + budget
 
-        if not can_complete:
-            return
-        
-        for pos in weighted:
-            row, col = pos[0], pos[1]
-            weight = pos[2]
+                # the next depth takes longer than all the previous ones together
+                if perf_counter() - start > budget / 2:
+                    break
 
-            if self.weighted_board[row][col] < weight:
-                self.weighted_board[row][col] = weight
+        self.deadline = None
+        if stats:
+            stats.table_hits = self.table.hits - table_hits
+            stats.table_probes = stats.table_hits + self.table.misses - table_misses
+            self._report_stats(start)
 
+        return best_col
 
-    def _get_individual_weight(self, line:list[tuple[int, int]], weighted:list, player:int) -> bool:
-        '''Lists the individual slots and their weights. Returns True if a line of 4 pieces can be formed.'''
-        if len(line) < 3:
-            return
 
-        if player == 1:
-            ally, enemy = 1, 2
-        elif player == 2:
-            ally, enemy = 2, 1
+    def _report_stats(self, start:float):
+        '''Completes the stats of the search and hands them to the hook.'''
+        self.stats.nodes = self.nodes
+        self.stats.seconds = perf_counter() - start
+        self.stats_hook(self.stats)
 
-        can_complete = bool
-        weight = 0
 
-        for i in range(len(line)):
-            row, col = line[i][0], line[i][1]
+    def cancel(self):
+        '''
+        Stops the running search, which returns the best move found so far.\n
+        The flag stays set until 'cancelled' is cleared by the caller.
+        '''
+        self.cancelled = True
 
-            if not self._in_bounds(row,col):
-                continue
 
-            if self.array[row][col].player == ally:
-                weight += 1
-                can_complete = True
+    def ponder(self, board:Board, time_budget_ms:int = None, first:int = None):
+        '''
+        Searches the reply to every move the opponent can make on the board.\n
+        The replies are kept in 'pondered' and the table, so make_move( ) answers
+        instantly when the opponent plays one of them. 'first' is the column
+        searched before the others, the one the opponent is most likely to play.
+        The stats hook doesn't see these searches and the principal variation
+        stays the one of the last move played.
+        '''
+        self.pondered = {}
 
-            elif self.array[row][col].player == enemy:
-                if i > 1 and self.array[row][col-(i+2)].player != enemy and self._in_bounds(row, col-(i+2)):
-                    continue
-                else:
-                    return
+        # the heuristic already answers instantly
+        if self.solver or not (self.depth > 0 or time_budget_ms is not None):
+            return
 
-        for pos in line:
-            row, col = pos[0], pos[1]
-            if self.array[row][col].player == 0:
-                if self._is_floating((row,col)):
+        board = board.copy()
+        columns = sorted(MOVE_ORDER, key=lambda col: col != first)
+
+        # the searches of moves that may never be played are not reported
+        stats_hook, stats, principal_variation = self.stats_hook, self.stats, self.principal_variation
+        self.stats_hook = None
+
+        try:
+            for col in columns:
+                if self.cancelled:
                     break
-                weighted.append((row, col, weight))
+                if not board.can_play(col) or board.is_winning_move(col, self.opponent):
+                    continue
 
-        return can_complete
+                board.play(col, self.opponent)
+                if len(board.moves) < 42:
+                    reply = self.search(board, time_budget_ms)
+                    if not self.cancelled:
+                        self.pondered[board.key()] = reply
+                board.undo()
+        finally:
+            self.stats_hook, self.stats, self.principal_variation = stats_hook, stats, principal_variation
 
 
-    def _is_floating(self, pos:tuple[int, int]) -> bool:
-        '''Returns True if the given position has no pieces below it, returns False otherwise.'''
-        x, y = pos[0], pos[1]
-        if (x < 5) and self.array[x+1][y].player == 0:
-            return True
-        else:
-            return False
+    def _search_root(self, board:Board, moves:list[int], depth:int) -> tuple[int, int]:
+        '''Returns the best column and its score searching the given depth.'''
+        best_col = moves[0]
+        alpha, beta = -WIN_SCORE-1, WIN_SCORE+1
 
+        threats = self.search_map
 
-    def _in_bounds(self, x:int = None, y:int = None) -> bool:
-        '''Returns True if the given coordinates are within the grid boundaries, returns False otherwise.'''
-        inside = bool
+        for col in moves:
+            threats.play(col * HEIGHT + board.heights[col], self.player)
+            board.play(col, self.player)
+            score = -self._negamax(board, self.opponent, depth-1, -beta, -alpha)
+            board.undo()
+            threats.undo()
 
-        if not y:
-            inside = x >= 0 and x < 6
-        elif not x:
-            inside = y >= 0 and y < 7
-        else:
-            inside = (x >=0 and x < 6) and (y >= 0 and y < 7)
-
-        return inside
-    
-
-    def make_move(self, game_array:list[list]) -> tuple[int, int]:
-        '''Returns the best valid move to play.'''
-        self._set_default(game_array)
-
-        self._get_board_weight(2)
-        atk_moves = self._get_weighted_pos()
-        self._get_board_weight(1)
-        def_moves = self._get_weighted_pos()
-
-        strong_atk = atk_moves[1]
-        strong_def = def_moves[1]
-        weak_atk = atk_moves[0]
-        weak_def = def_moves[0]
-
-        move = None
-
-        if strong_atk:
-            move = choice(strong_atk)
-        elif strong_def:
-            move = choice(strong_def)
-        elif weak_atk:
-            move = choice(weak_atk)
-        elif weak_def:
-            move = choice(weak_def)
+            if score > alpha:
+                alpha = score
+                best_col = col
+
+        return best_col, alpha
+
+
+    def _search_root_parallel(self, board:Board, moves:list[int], depth:int) -> tuple[int, int]:
+        '''
+        Returns the best column and its score, searching every root move in a worker process.\n
+        Each move gets its exact score, so the first best move in the given order
+        is the same one the serial search picks.
+        '''
+        if self.executor is None:
+            self.worker_stop = multiprocessing.Event()
+            self.executor = ProcessPoolExecutor(self.workers, initializer=_start_worker,
+                                                initargs=(self.player, self.tt_bytes, self.worker_stop))
+
+        self.worker_stop.clear()
+
+        state = (board.masks, board.heights, board.moves)
+        futures = [self.executor.submit(_score_move, state, col, depth) for col in moves]
+
+        while wait(futures, timeout=WAIT_INTERVAL).not_done:
+            if self.cancelled or (self.deadline and perf_counter() > self.deadline):
+                for future in futures:
+                    future.cancel()
+
+                # the running searches stop within a few nodes, then the pool is free for the next move
+                self.worker_stop.set()
+                wait(futures)
+                raise SearchTimeout
+
+        scores = [future.result() for future in futures]
+        best = max(scores)
+
+        return moves[scores.index(best)], best
+
+
+    def close(self):
+        '''Stops the worker processes of the parallel search.'''
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+
+    def _get_principal_variation(self, board:Board, col:int) -> list[int]:
+        '''Returns the expected line of play starting with the given column, following the table.'''
+        line = []
+        player = self.player
+
+        while col != NO_MOVE and board.can_play(col) and len(line) < 42:
+            line.append(col)
+            board.play(col, player)
+            player = 1 if player == 2 else 2
+
+            entry = self.table.probe(board.key() << 1 | (player - 1))
+            col = entry[3] if entry else NO_MOVE
+
+        for _ in line:
+            board.undo()
+
+        return line
+
+
+    def _negamax(self, board:Board, player:int, depth:int, alpha:int, beta:int) -> int:
+        '''Returns the score of the position for the player to move, searching with alpha-beta pruning.'''
+        self.nodes += 1
+        if not self.nodes % CHECK_INTERVAL and (self.cancelled or (self.deadline and perf_counter() > self.deadline)
+                                                or (self.stop_event and self.stop_event.is_set())):
+            raise SearchTimeout
+
+        moves = [col for col in MOVE_ORDER if board.heights[col] < ROWS]
+        if not moves:
+            return 0
+
+        # faster wins are worth more than slower ones
+        for col in moves:
+            if is_winning_move(board, col, player):
+                return WIN_SCORE - board.move_count
+
+        opponent = 1 if player == 2 else 2
+
+        # the map keeps the score of red
+        if depth <= 0:
+            if self.stats:
+                self.stats.leaf_evaluations += 1
+            return self.search_map.score if player == 1 else -self.search_map.score
+
+        # the same pieces can be reached with either player to move
+        key = board.key() << 1 | (player - 1)
+        original_alpha = alpha
+
+        if entry := self.table.probe(key):
+            score, stored_depth, kind, move = entry
+
+            # deeper results would change the score of a fixed depth search,
+            # they are only used to order the moves
+            if stored_depth == depth:
+                if kind == EXACT:
+                    return score
+                elif kind == LOWER:
+                    alpha = max(alpha, score)
+                elif kind == UPPER:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    return score
+
+            # search the best move found last time first
+            if move != NO_MOVE and move in moves:
+                moves.remove(move)
+                moves.insert(0, move)
+
+        best_score = -WIN_SCORE-1
+        best_col = moves[0]
+        threats = self.search_map
+
+        for col in moves:
+            threats.play(col * HEIGHT + board.heights[col], player)
+            board.play(col, player)
+            score = -self._negamax(board, opponent, depth-1, -beta, -alpha)
+            board.undo()
+            threats.undo()
+
+            if score > best_score:
+                best_score = score
+                best_col = col
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if self.stats:
+                    self.stats.cutoffs += 1
+                    self.stats.first_move_cutoffs += col == moves[0]
+                break
+
+        if best_score <= original_alpha:
+            kind = UPPER
+        elif best_score >= beta:
+            kind = LOWER
         else:
-            move = choice(self._get_incomplete_columns())
+            kind = EXACT
 
-        return move
+        self.table.store(key, best_score, depth, kind, best_col)
 
+        return best_score
 
-    def _get_weighted_pos(self) -> tuple[list, list]:
-        '''Returns the positions of the weighted slots, separated by their respective weights.'''
-        weak = list()
-        strong = list()
 
-        for row in range(6):
-            for col in range(7):
-                if self.weighted_board[row][col] == 1:
-                    weak.append((row,col))
+# bot of the worker process, created once by the pool
+_worker_bot = None
 
-                elif self.weighted_board[row][col] == 2:
-                    strong.append((row,col))
 
-        return (weak, strong)
+def _start_worker(player:int, tt_bytes:int, stop_event:'multiprocessing.synchronize.Event'):
+    '''Creates the bot used by the worker process.'''
+    global _worker_bot
+    _worker_bot = Bot(player=player, tt_bytes=tt_bytes)
+    _worker_bot.table = TranspositionTable(tt_bytes)
+    _worker_bot.stop_event = stop_event
+
 
+def _score_move(state:tuple[list, list, list], col:int, depth:int) -> int | None:
+    '''
+    Returns the exact score of playing the column on the board, searching the given depth.\n
+    Returns None when the main process stops the search.
+    '''
+    bot = _worker_bot
 
-    def _get_incomplete_columns(self) -> list[tuple]:
-        '''Returns the positions of incomplete columns.'''
-        columns = []
+    board = Board()
+    board.masks, board.heights, board.moves = state
+    bot.search_map.sync(board)
 
-        for col in range(7):
-            if self.array[0][col].player == 0:
-                columns.append((0, col))
+    bot.search_map.play(col * HEIGHT + board.heights[col], bot.player)
+    board.play(col, bot.player)
 
-        return columns
+    try:
+        return -bot._negamax(board, bot.opponent, depth-1, -WIN_SCORE-1, WIN_SCORE+1)
+    except SearchTimeout:
+        return None
 
 
 
@@ -0,0 +1,162 @@
+import mmap
+import struct
+from math import sqrt
+from typing import Iterable
+from bitboard import Board, canonical
+from book import position_key
+from records import GameRecord, read_records, TIE, UNFINISHED
+from transposition import NO_MOVE
+
+
+MAGIC = b'C4EX'
+VERSION = 1
+
+# magic, version, amount of records
+HEADER = struct.Struct('<4sB3xQ')
+
+# position key, visits, wins, draws and losses of the player to move, best column
+RECORD = struct.Struct('<QIIIIB3x')
+
+KEY = struct.Struct('<Q')
+
+# z value of a 95% confidence interval
+Z_95 = 1.96
+
+
+def wilson_interval(successes: float, total: int, z: float = Z_95) -> tuple[float, float]:
+    '''Returns the confidence interval of a proportion.'''
+    if total == 0:
+        return (0.0, 0.0)
+
+    rate = successes / total
+    denominator = 1 + z**2 / total
+    center = (rate + z**2 / (2 * total)) / denominator
+    margin = z * sqrt(rate * (1 - rate) / total + z**2 / (4 * total**2)) / denominator
+
+    return (max(0.0, center - margin), min(1.0, center + margin))
+
+
+class PositionDatabase:
+    '''
+    Read-only view of a database created with build_database( ).\n
+    Like the opening book, the file is memory mapped and binary searched in
+    place, so processes that open the same file share its pages.
+    '''
+    def __init__(self, path: str):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.count = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f'{path} is not a version {VERSION} position database')
+
+
+    def __len__(self) -> int:
+        return self.count
+
+
+    def close(self):
+        '''Releases the file.'''
+        self.data.close()
+        self.file.close()
+
+
+    def lookup(self, board: Board, player: int) -> tuple[int, int, int, int, int] | None:
+        '''
+        Returns the (visits, wins, draws, losses, best column) of the position
+        for the player to move, None if it was never played.
+        '''
+        key, reflected = canonical(position_key(board, player))
+
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = HEADER.size + middle * RECORD.size
+            stored = KEY.unpack_from(self.data, offset)[0]
+
+            if stored < key:
+                low = middle + 1
+            elif stored > key:
+                high = middle
+            else:
+                _, visits, wins, draws, losses, col = RECORD.unpack_from(self.data, offset)
+                if reflected and col != NO_MOVE:
+                    col = 6 - col
+                return visits, wins, draws, losses, col
+
+        return None
+
+
+def build_database(path: str, games: Iterable[GameRecord] | str, min_visits: int = 1) -> int:
+    '''
+    Replays the games and writes the statistics of every position reached to a database file.\n
+    'games' is an iterable of records or the path of a record file. Reflected
+    positions are merged, unfinished games are skipped and positions seen less
+    than 'min_visits' times are left out. Returns the amount of records written.\n
+    The best column is the move with the highest lower bound of the 95%
+    confidence interval of its score (a win counts 1, a tie 0.5), so a move
+    that won the only game it was played in doesn't beat a move that won most
+    of many games.
+    '''
+    if isinstance(games, str):
+        games = read_records(games, metadata=False)
+
+    # (visits, wins, draws, losses) of every move, by canonical position key and column
+    moves = {}
+
+    for game in games:
+        if game.result == UNFINISHED:
+            continue
+
+        board = Board()
+        player = game.first
+
+        for col in game.moves:
+            key, reflected = canonical(position_key(board, player))
+            stats = moves.setdefault((key, 6 - col if reflected else col), [0, 0, 0, 0])
+
+            stats[0] += 1
+            if game.result == TIE:
+                stats[2] += 1
+            elif game.result == player:
+                stats[1] += 1
+            else:
+                stats[3] += 1
+
+            board.play(col, player)
+            player = 1 if player == 2 else 2
+
+    # totals and best (lower bound of the score, visits, column) of every position
+    positions = {}
+    for (key, col), (visits, wins, draws, losses) in moves.items():
+        total = positions.setdefault(key, [0, 0, 0, 0, (-1.0, 0, NO_MOVE)])
+        total[0] += visits
+        total[1] += wins
+        total[2] += draws
+        total[3] += losses
+        total[4] = max(total[4], (wilson_interval(wins + draws / 2, visits)[0], visits, col))
+
+    with open(path, 'wb') as file:
+        records = [(key, total) for key, total in sorted(positions.items()) if total[0] >= min_visits]
+        file.write(HEADER.pack(MAGIC, VERSION, len(records)))
+
+        for key, (visits, wins, draws, losses, best) in records:
+            file.write(RECORD.pack(key, visits, wins, draws, losses, best[2]))
+
+    return len(records)
+
+
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Builds a position database from a game record file.')
+    parser.add_argument('records', help='game record file')
+    parser.add_argument('path', help='output file')
+    parser.add_argument('--min-visits', type=int, default=1, help='positions seen less often are left out')
+    args = parser.parse_args()
+
+    count = build_database(args.path, args.records, args.min_visits)
+    print(f'{count} positions written to {args.path}')
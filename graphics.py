@@ -1,107 +1,181 @@
 import tkinter as tk
 from animation import load_frames
+from atlas import get_sheet, drop_sheets
+
+
+# theme directory of each theme
+THEMES = {'dark': 'dark_theme', 'light': 'light_theme'}
+
+# still images of every theme
+IMAGES = ('top_wall', 'left_wall', 'right_wall', 'bottom_wall',
+          'red_slot', 'empty_slot', 'orange_slot',
+          'empty_space', 'empty_space_edge',
+          'red_indicator_bottom', 'orange_indicator_bottom')
+
+# directory of every animation sequence, '{theme}' is replaced by the theme directory
+SEQUENCES = {# smoke reveal animation
+             'red_smoke': 'default/smoke/red_smoke',
+             'orange_smoke': 'default/smoke/orange_smoke',
+
+             # crown glimmer animation
+             'red_crown': 'default/crown/red_crown',
+             'orange_crown': 'default/crown/orange_crown',
+
+             # indicator animation
+             'orange_indicator': '{theme}/animated/orange_indicator',
+             'red_indicator': '{theme}/animated/red_indicator',
+
+             # starting fall animation (top)
+             'o_fall_top_start': '{theme}/animated/o_fall_top_s',
+             'r_fall_top_start': '{theme}/animated/r_fall_top_s',
+
+             # starting fall animation
+             'oo_fall_start': '{theme}/animated/oo_fall_s',
+             'or_fall_start': '{theme}/animated/or_fall_s',
+             'ro_fall_start': '{theme}/animated/ro_fall_s',
+             'rr_fall_start': '{theme}/animated/rr_fall_s',
+
+             # fall animation (top)
+             'o_fall_top': '{theme}/animated/o_fall_top',
+             'r_fall_top': '{theme}/animated/r_fall_top',
+
+             # fall animation (bottom)
+             'o_fall_bot': '{theme}/animated/o_fall_bot',
+             'r_fall_bot': '{theme}/animated/r_fall_bot',
+
+             # fall animation
+             'oo_fall': '{theme}/animated/oo_fall',
+             'or_fall': '{theme}/animated/or_fall',
+             'ro_fall': '{theme}/animated/ro_fall',
+             'rr_fall': '{theme}/animated/rr_fall'}
+
+# sequences of the reset animation by the code of Logic.get_fall_plan( ),
+# the piece in the slot plus 3 times the piece above it
+FALL_START = (None, 'r_fall_top_start', 'o_fall_top_start',
+              None, 'rr_fall_start', 'or_fall_start',
+              None, 'ro_fall_start', 'oo_fall_start')
+
+FALL = (None, 'r_fall_top', 'o_fall_top',
+        None, 'rr_fall', 'or_fall',
+        None, 'ro_fall', 'oo_fall')
+
+# decoded images and sequences by (theme directory, name) for every Tk interpreter,
+# shared by the Graphics instances of a window
+_caches = {}
+
+# (name, frame index) of every decoded image by its Tk name for every Tk interpreter,
+# the index is None for still images
+_owners = {}
 
 
 class Graphics:
+    '''
+    Images and animation sequences of the game.\n
+    Every image is decoded the first time it is used and kept in a cache
+    shared by the instances of the window, so switching themes reuses what was
+    already loaded. warm_up( ) loads the rest in idle callbacks.\n
+    The images belong to the display, and the cache of a display is dropped
+    when it is destroyed.
+    '''
     def __init__(self, display, theme):
         self.display = display
+        self.set_theme(theme)
 
-        if theme == 'dark':
-            self.theme = 'dark_theme'
+        self.cache = _caches.setdefault(display.tk, {})
+        self.owners = _owners.setdefault(display.tk, {})
+        display.bind('<Destroy>', self._forget, add='+')
 
-        elif theme == 'light':
-            self.theme = 'light_theme'
+        # sequences of the reset animation, loaded when first used
+        self.fall_start = SequenceMap(self, FALL_START)
+        self.fall = SequenceMap(self, FALL)
 
-        # list to hold the identifiers of the tkinter after functions 
-        self.stop_ids = []
 
-        # create image instances
-        self.load_images()
-        self.load_image_sequences()
+    def __getattr__(self, name: str):
+        if name in SEQUENCES or name in IMAGES:
+            return self.load(name)
+        raise AttributeError(f'{type(self).__name__!r} object has no attribute {name!r}')
 
 
-    def load_images(self):
-        '''Creates instances of image files.'''
+    def set_theme(self, theme: str):
+        '''Changes the theme of the images returned from now on.'''
+        self.theme = THEMES[theme]
 
-        # game border structure
-        self.top_wall = Image('top_wall', self.theme)
-        self.left_wall = Image('left_wall', self.theme)
-        self.right_wall = Image('right_wall', self.theme)
-        self.bottom_wall = Image('bottom_wall', self.theme)
 
-        # slots
-        self.red_slot = Image('red_slot', self.theme)
-        self.empty_slot = Image('empty_slot', self.theme)
-        self.orange_slot = Image('orange_slot', self.theme)
+    def load(self, name: str) -> 'Image | list[tk.PhotoImage]':
+        '''Returns the image or sequence of the current theme, decoding it on first use.'''
+        key = self._key(name)
 
-        # placeholder for indicators
-        self.empty_space = Image('empty_space', self.theme)
-        self.empty_space_edge = Image('empty_space_edge', self.theme)
+        if key not in self.cache:
+            if name in SEQUENCES:
+                frames = load_frames(f'assets/sprites/{SEQUENCES[name].format(theme=key[0])}', self.display)
+                for index, frame in enumerate(frames):
+                    self.owners[str(frame)] = (name, index)
+                self.cache[key] = frames
+            else:
+                image = Image(name, key[0], self.display)
+                self.owners[str(image)] = (name, None)
+                self.cache[key] = image
 
-        # indicators
-        self.red_indicator_bottom = Image('red_indicator_bottom', self.theme)
-        self.orange_indicator_bottom = Image('orange_indicator_bottom', self.theme)
+        return self.cache[key]
 
 
-    def load_image_sequences(self):
-        '''Creates instances of image files in a list.'''
+    def convert(self, image_name: str) -> tk.PhotoImage | None:
+        '''Returns the image of the current theme that matches an image of any theme, None for other images.'''
+        if (owner := self.owners.get(str(image_name))) is None:
+            return None
 
-        # smoke reveal animation
-        self.red_smoke = load_frames(f'assets/sprites/default/smoke/red_smoke')
-        self.orange_smoke = load_frames(f'assets/sprites/default/smoke/orange_smoke')
+        name, index = owner
+        image = self.load(name)
+        return image if index is None else image[index]
 
-        # crown glimmer animation
-        self.red_crown = load_frames(f'assets/sprites/default/crown/red_crown')
-        self.orange_crown = load_frames(f'assets/sprites/default/crown/orange_crown')
 
-        # indicator animation
-        self.orange_indicator = load_frames(f'assets/sprites/{self.theme}/animated/orange_indicator')
-        self.red_indicator = load_frames(f'assets/sprites/{self.theme}/animated/red_indicator')
+    def warm_up(self):
+        '''Loads the images that were not used yet, one image or sequence per idle callback.'''
+        pending = [name for name in (*IMAGES, *SEQUENCES) if self._key(name) not in self.cache]
 
-        # starting fall animation (top)
-        self.o_fall_top_start = load_frames(f'assets/sprites/{self.theme}/animated/o_fall_top_s')
-        self.r_fall_top_start = load_frames(f'assets/sprites/{self.theme}/animated/r_fall_top_s')
+        def load_next():
+            if pending:
+                self.load(pending.pop(0))
+                self.display.after_idle(load_next)
 
-        # starting fall animation
-        self.oo_fall_start = load_frames(f'assets/sprites/{self.theme}/animated/oo_fall_s')
-        self.or_fall_start = load_frames(f'assets/sprites/{self.theme}/animated/or_fall_s')
+        self.display.after_idle(load_next)
 
-        self.ro_fall_start = load_frames(f'assets/sprites/{self.theme}/animated/ro_fall_s')
-        self.rr_fall_start = load_frames(f'assets/sprites/{self.theme}/animated/rr_fall_s')
 
-        # fall animation (top)
-        self.o_fall_top = load_frames(f'assets/sprites/{self.theme}/animated/o_fall_top')
-        self.r_fall_top = load_frames(f'assets/sprites/{self.theme}/animated/r_fall_top')
+    def _forget(self, event: tk.Event):
+        '''Drops the images of the display once it is destroyed.'''
+        if event.widget is self.display:
+            _caches.pop(self.display.tk, None)
+            _owners.pop(self.display.tk, None)
+            drop_sheets(self.display)
 
-        # fall animation (bottom)
-        self.o_fall_bot = load_frames(f'assets/sprites/{self.theme}/animated/o_fall_bot')
-        self.r_fall_bot = load_frames(f'assets/sprites/{self.theme}/animated/r_fall_bot')
 
-        # fall animation
-        self.oo_fall = load_frames(f'assets/sprites/{self.theme}/animated/oo_fall')
-        self.or_fall = load_frames(f'assets/sprites/{self.theme}/animated/or_fall')
+    def _key(self, name: str) -> tuple[str, str]:
+        '''Returns the cache key of the image, sequences outside the theme directories are shared.'''
+        if name in SEQUENCES and not SEQUENCES[name].startswith('{theme}'):
+            return (SEQUENCES[name].partition('/')[0], name)
+        return (self.theme, name)
 
-        self.ro_fall = load_frames(f'assets/sprites/{self.theme}/animated/ro_fall')
-        self.rr_fall = load_frames(f'assets/sprites/{self.theme}/animated/rr_fall')
 
-        self.fall_start = {'r':self.r_fall_top_start,
-                            'o':self.o_fall_top_start,
-                            'rr':self.rr_fall_start,
-                            'ro':self.ro_fall_start,
-                            'oo':self.oo_fall_start,
-                            'or':self.or_fall_start}
+class SequenceMap:
+    '''Sequences by the code of the fall plan, loaded when first used.'''
+    def __init__(self, graphics: Graphics, names: tuple[str, ...]):
+        self.graphics = graphics
+        self.names = names
 
-        self.fall = {'r':self.r_fall_top,
-                    'o':self.o_fall_top,
-                    'rr':self.rr_fall,
-                    'ro':self.ro_fall,
-                    'oo':self.oo_fall,
-                    'or':self.or_fall}
+    def __getitem__(self, code: int) -> list[tk.PhotoImage]:
+        return self.graphics.load(self.names[code])
 
 
 class Image(tk.PhotoImage):
-    def __init__(self, file_name: str, theme: str):
-        super().__init__(file=f'assets/sprites/{theme}/{file_name}.png')
+    def __init__(self, file_name: str, theme: str, master: tk.Misc = None):
+        sheet = get_sheet(theme, master)
+
+        if sheet and file_name in sheet.images:
+            region = sheet.images[file_name]
+            super().__init__(master=master, width=region[2], height=region[3])
+            sheet.cut(region, self)
+        else:
+            super().__init__(master=master, file=f'assets/sprites/{theme}/{file_name}.png')
 
 
 if __name__ == '__main__':
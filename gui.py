@@ -1,11 +1,15 @@
 import tkinter as tk
 from random import choice
 from graphics import Graphics
-from playsound import playsound
-from animation import Sprite
+from audio import AudioEngine, SilentBackend
+from animation import Sprite, CanvasSprite
 from typing import Callable
 
 
+# frame rate of the reset animation
+FALL_FPS = 24
+
+
 class Display(tk.Tk):
     '''
     Initializes the game window.\n
@@ -13,32 +17,42 @@ class Display(tk.Tk):
         mode
             'dark' for dark mode, 'light' for light mode\n
             Light mode by default
+        renderer
+            'labels' draws every slot with its own label widget\n
+            'canvas' draws the slots and indicators as image items of one canvas per area
+        muted
+            True to play no sounds
     '''
-    def __init__(self, theme: str = 'light'):
+    def __init__(self, theme: str = 'light', renderer: str = 'labels', muted: bool = False):
         super().__init__()
 
+        if renderer not in ('labels', 'canvas'):
+            raise ValueError(f'unknown renderer {renderer!r}')
+        self.renderer = renderer
+
         self.minsize(875, 850)
         self.title('Connect 4')
 
-        if theme == 'dark':
-            self.configure(bg= '#201e23')
-            self.bg = '#201e23'
-            self.fg = 'white'
-        elif theme == 'light':
-            self.configure(bg= 'white')
-            self.bg = 'white'
-            self.fg = '#201e23'
+        self.theme = theme
+        self._set_colors(theme)
 
         # 2D list with the image labels of each slot
         self.slots = [[col for col in range(7)] for row in range(6)]
 
         self.mouse_pos = None
 
+        # column that shows the piece indicator, None when it is hidden
+        self.indicator_col = None
+
         self.graphics = Graphics(self, theme)
+        self.audio = AudioEngine(SilentBackend() if muted else None)
 
         self._create_frames(theme)
         self._create_layout()
 
+        # the images that were not needed to draw the window load while it is idle
+        self.graphics.warm_up()
+
     # layout
     def _create_frames(self, theme: str):
         '''Creates frames and set image files.'''
@@ -48,7 +62,10 @@ class Display(tk.Tk):
 
         self.center_frame = tk.Frame(self.main_frame)
         self.left_wall_frame = Wall(self.center_frame, self.graphics.left_wall).pack(side=tk.LEFT)
-        self.grid = Grid(self, self.center_frame, self.graphics.empty_slot, self.slots).pack(side=tk.LEFT)
+        if self.renderer == 'canvas':
+            self.grid = BoardCanvas(self, self.center_frame, self.graphics.empty_slot, self.slots).pack(side=tk.LEFT)
+        else:
+            self.grid = Grid(self, self.center_frame, self.graphics.empty_slot, self.slots).pack(side=tk.LEFT)
         self.right_wall_frame = Wall(self.center_frame, self.graphics.right_wall).pack(side=tk.LEFT)
 
         self.bottom_wall_frame = Wall(self.main_frame, self.graphics.bottom_wall)
@@ -72,10 +89,60 @@ class Display(tk.Tk):
         self.hide_endscreen()
 
 
+    def _set_colors(self, theme: str):
+        '''Sets the background and text colors of the theme.'''
+        if theme == 'dark':
+            self.configure(bg= '#201e23')
+            self.bg = '#201e23'
+            self.fg = 'white'
+        elif theme == 'light':
+            self.configure(bg= 'white')
+            self.bg = 'white'
+            self.fg = '#201e23'
+
+
+    def set_theme(self, theme: str):
+        '''Switches the window to another theme, reusing the images that were already loaded.'''
+        if theme == self.theme:
+            return
+
+        old_bg, old_fg = self.bg, self.fg
+        self.theme = theme
+        self._set_colors(theme)
+        self.graphics.set_theme(theme)
+
+        self._apply_theme(self, old_bg, old_fg)
+        self.graphics.warm_up()
+
+
+    def _apply_theme(self, parent: tk.Misc, old_bg: str, old_fg: str):
+        '''Replaces the images and colors of the old theme in every widget inside the parent.'''
+        for widget in parent.winfo_children():
+            # sprites also convert the sequences they are playing or have queued
+            if isinstance(widget, (BoardCanvas, Sprite)):
+                widget.apply_theme(self.graphics.convert)
+
+            if isinstance(widget, tk.Label):
+                if not isinstance(widget, Sprite) and (image := self.graphics.convert(widget['image'])):
+                    widget['image'] = image
+                if widget['fg'] == old_fg:
+                    widget['fg'] = self.fg
+
+            if widget['bg'] == old_bg:
+                widget['bg'] = self.bg
+
+            self._apply_theme(widget, old_bg, old_fg)
+
+
     def _create_piece_view(self):
         '''Creates the frame for the piece indicator.'''
         self.columns = [None for col in range(7)]
-        self.piece_view = PieceView(self, self.main_frame, self.graphics.empty_space, self.columns)
+
+        if self.renderer == 'canvas':
+            self.piece_view = tk.Frame(self.main_frame)
+            BoardCanvas(self, self.piece_view, self.graphics.empty_space, [self.columns]).grid(row=0, column=1)
+        else:
+            self.piece_view = PieceView(self, self.main_frame, self.graphics.empty_space, self.columns)
 
         ImgLabel(self.piece_view, image=self.graphics.empty_space_edge).grid(row=0, column=0)
         ImgLabel(self.piece_view, image=self.graphics.empty_space_edge).grid(row=0, column=8)
@@ -127,26 +194,41 @@ class Display(tk.Tk):
         '''Binds a spacebar key press event.'''
         self.bind('<Key>', lambda event: reset(True if event.keysym == 'space' else False))
 
+
+    def bind_theme_event(self):
+        '''Binds the T key to switch between the dark and light theme.'''
+        self.bind('<KeyPress-t>', lambda event: self.set_theme('light' if self.theme == 'dark' else 'dark'))
+
     # animations
-    def fall_animation(self, board_state:list['str'], next_board_state:Callable):
-        '''Plays the falling animation for every occupied slot.'''
-        for _ in range(7):
-            for row in range(6):
-                for col in range(7):
-                    if board_state[row][col] == '':
-                        self.slots[row][col].set_image(self.graphics.empty_slot)
-                    elif _ == 0:
-                        self.slots[row][col].chain(self.graphics.fall_start[board_state[row][col]], fps=24)
-                    else:
-                        self.slots[row][col].chain(self.graphics.fall[board_state[row][col]], fps=24)
-            next_board_state()
+    def fall_animation(self, plan:tuple[tuple[tuple[int, ...], ...], ...]) -> int:
+        '''
+        Plays the falling animation for every occupied slot, following the plan of Logic.get_fall_plan( ).\n
+        Returns the duration of the animation in milliseconds.
+        '''
+        longest = 0
 
         for row in range(6):
             for col in range(7):
-                self.slots[row][col].chain_image(self.graphics.empty_slot, timer=1)
-                self.slots[row][col].play()
+                codes = plan[row][col]
+                slot = self.slots[row][col]
+
+                if not codes:
+                    slot.set_image(self.graphics.empty_slot)
+                    continue
+
+                sequences = [self.graphics.fall_start[codes[0]]] + [self.graphics.fall[code] for code in codes[1:]]
+                for sequence in sequences:
+                    slot.chain(sequence, fps=FALL_FPS)
+
+                slot.chain_image(self.graphics.empty_slot, timer=1)
+                slot.play()
 
-        playsound('assets/sound/rattle.wav', block=False)
+                # each sequence hands over to the next one as its last frame shows
+                longest = max(longest, sum(len(sequence) - 1 for sequence in sequences))
+
+        self.audio.play('rattle')
+
+        return round(longest * 1000 / FALL_FPS)
 
 
     def winner_animation(self, winner_segment:list[tuple[int, int]], turn: int):
@@ -159,7 +241,7 @@ class Display(tk.Tk):
             smoke = self.graphics.orange_smoke
             crown = self.graphics.orange_crown
 
-        playsound('assets/sound/crown.wav', block=False)
+        self.audio.play('crown')
 
         for pos in winner_segment:
             x, y = pos[0], pos[1]
@@ -180,19 +262,27 @@ class Display(tk.Tk):
             indicator = self.graphics.orange_indicator
             indicator_bottom = self.graphics.orange_indicator_bottom
 
-        if column_is_full(self.mouse_pos):
-            self.columns[self.mouse_pos].set_image(self.graphics.empty_space)
-        else:
+        if not column_is_full(self.mouse_pos):
             self.columns[self.mouse_pos].play(indicator, loop=True)
             self.slots[0][self.mouse_pos].set_image(indicator_bottom)
+            self.indicator_col = self.mouse_pos
 
 
-    def erase_indicator(self, column_is_full: Callable):
-        '''Changes the indicator into an empty image.'''
-        for _ in range(7):
-            if not column_is_full(_):
-                self.slots[0][_].set_image(self.graphics.empty_slot)
-            self.columns[_].set_image(self.graphics.empty_space)
+    def erase_indicator(self, column_is_full: Callable = None):
+        '''
+        Changes the indicator into an empty image.\n
+        Only the column that shows the indicator is touched, the top slot is
+        cleared if it still shows the bottom of the indicator.
+        '''
+        col = self.indicator_col
+        if col is None:
+            return
+
+        self.indicator_col = None
+        self.columns[col].set_image(self.graphics.empty_space)
+
+        if self.slots[0][col].image in (self.graphics.red_indicator_bottom, self.graphics.orange_indicator_bottom):
+            self.slots[0][col].set_image(self.graphics.empty_slot)
 
 
     def drop_animation(self, pos:tuple[int, int], sequence:list[tk.PhotoImage], sequence_bot:list[tk.PhotoImage], image:tk.PhotoImage, func):
@@ -237,16 +327,12 @@ class Display(tk.Tk):
             sequence_bot = self.graphics.o_fall_bot
             image = self.graphics.orange_slot
 
-        sounds = ['assets/sound/click1.wav',
-                  'assets/sound/click2.wav',
-                  'assets/sound/click3.wav']
-
-        playsound(choice(sounds), block=False)
+        self.audio.play(choice(('click1', 'click2', 'click3')))
         self.drop_animation(pos, sequence, sequence_bot, image, func)
 
 
     def reset(self):
-        '''Resets the slots image.'''
+        '''Resets the slots image, only the slots that are not empty are configured.'''
         for row in range(6):
             for col in range(7):
                 self.slots[row][col].set_image(self.graphics.empty_slot)
@@ -275,6 +361,34 @@ class Grid(tk.Frame):
                 slots[row][col].grid(row=row, column=col)
 
 
+class BoardCanvas(tk.Canvas):
+    '''
+    Creates a canvas and draws a grid of image items on it.\n
+    The cells are CanvasSprites, so they animate like the labels of Grid but
+    each frame only configures the items whose image changed.
+    '''
+    def __init__(self, display, parent, image, cells: list[list[int]]):
+        rows, cols = len(cells), len(cells[0])
+        width, height = image.width(), image.height()
+
+        super().__init__(parent, width=width*cols, height=height*rows,
+                         relief=tk.FLAT, borderwidth=0, highlightthickness=0)
+
+        for row in range(rows):
+            for col in range(cols):
+                item = self.create_image(col*width, row*height, image=image, anchor=tk.NW)
+                cells[row][col] = CanvasSprite(display, self, item, image)
+
+        self.cells = cells
+
+
+    def apply_theme(self, convert: Callable):
+        '''Replaces the images of every cell, in its animations too, with the ones returned by convert.'''
+        for row in self.cells:
+            for cell in row:
+                cell.apply_theme(convert)
+
+
 class Wall(tk.Frame):
     '''Creates a frame and places an image inside of it.'''
     def __init__(self, parent, image):
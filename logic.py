@@ -1,5 +1,6 @@
 from random import randint
 from win_search import find_winner
+from bitboard import Board, GridView, HEIGHT
 
 class GameData:
     def __init__(self):
@@ -12,48 +13,33 @@ class GameData:
         self.red_score = 0
         self.orange_score = 0
 
-        # 2D list to hold information about each slot
-        self.array = [[Slot(row, col) for col in range(7)] for row in range(6)]
+        # bitboard that holds the pieces of both players
+        self.board = Board()
 
-        # 2D list to store the final state of the board
-        self.board_state = [['' for col in range(7)] for row in range(6)]
+        # row/col view of the board
+        self.array = GridView(self.board)
 
 
 class Logic(GameData):
     def reset(self):
         self.turn = randint(1,2)
         self.move_count = 0
-        self.array = [[Slot(row, col) for col in range(7)] for row in range(6)]
+        self.board.reset()
 
 
     def update_slot(self, pos: tuple[int, int]):
-        '''Assigns a player to the slot at the specified position.'''
-        x, y = pos[0], pos[1]
-        self.array[x][y].player = self.turn
+        '''Drops a piece of the current player in the column of the specified position.'''
+        self.board.play(pos[1], self.turn)
 
 
     def find_bottom(self, pos: tuple[int, int]) -> tuple[int, int] | bool:
         '''Returns the coordinates of the bottomost slot the piece can fall to.'''
-        y = pos[1]
-        for row in range(5, -1, -1):
-            if self.array[row][y].player == 0:
-                return (row, y)
+        return self.board.bottom(pos[1])
     
 
     def column_is_full(self, col: int) -> bool:
         '''Returns True if the specified column is full, returns False otherwise.'''
-        for row in range(6):
-            if self.array[row][col].player == 0:
-                return False
-        return True
-
-
-    def get_tallest_collumn(self):
-        '''Returns the height of the tallest column.'''
-        for row in range(6):
-            for col in range(7):
-                if self.array[row][col].player != 0:
-                    return 6-row
+        return self.board.is_full(col)
 
 
     def next_turn(self) -> bool:
@@ -69,47 +55,34 @@ class Logic(GameData):
         return True
         
 
-    def search_winner(self, row, col) -> list[tuple[int, int]] | bool:
-        return find_winner(self.array, row, col)
-
-
-    def _find_sequence(self, col:int):
-        '''Returns the order of the pieces in the given column.'''
-        column = [self.array[row][col].player for row in range(6)][::-1]
-        sequence = ['']*6
-
-        letter = {1:'r', 2:'o', 0:''}
-
-        for i in range(1, len(column)):
-            if i == 5:
-                sequence[i] = letter[column[i]]
-            sequence[i-1] = (letter[column[i-1]] + letter[column[i]])
-
-        return sequence
+    def search_winner(self, row, col) -> tuple[tuple[int, int], ...]:
+        return find_winner(self.board, row, col)
 
 
-    def get_board_state(self):
-        '''Returns the order of the pieces in the board.'''
-        columns = []
+    def get_fall_plan(self) -> tuple[tuple[tuple[int, ...], ...], ...]:
+        '''
+        Returns the reset animation of every slot, compiled in one pass over the columns.\n
+        plan[row][col] holds the codes of the sequences the slot plays, the first
+        from Graphics.fall_start and the rest from Graphics.fall. A code is the
+        piece in the slot plus 3 times the piece above it, 'r' is 1 and 'ro' is 7.
+        Empty slots play nothing.
+        '''
+        plan = [[() for col in range(7)] for row in range(6)]
+        red, orange = self.board.masks
 
         for col in range(7):
-            columns.append(self._find_sequence(col))
-
-        for col in range(7):
-            for row in range(6):
-                self.board_state[row][col] = columns[col][row]
-
-        self.board_state = self.board_state[::-1]
-
-        return self.board_state
+            height = self.board.heights[col]
+            bit = col * HEIGHT
 
+            # pieces from the bottom up, with an empty slot above the top one
+            pieces = [(red >> (bit + row) & 1) | (orange >> (bit + row) & 1) << 1 for row in range(height)] + [0]
+            codes = tuple(pieces[row] + 3 * pieces[row+1] for row in range(height))
 
-    def next_board_state(self):
-        '''Drops all the pieces in the board by one slot.'''
-        self.board_state.pop()
-        self.board_state.insert(0, ['' for col in range(7)])
+            # the slot shows the pieces above it falling through, one per step
+            for row in range(height):
+                plan[5 - row][col] = codes[row:]
 
-        return self.board_state
+        return tuple(tuple(row) for row in plan)
 
 
     def next_column_state(self, pos:tuple[int,int]):
@@ -121,14 +94,6 @@ class Logic(GameData):
             return (pos[0]-1,pos[1])
 
 
-class Slot:
-    '''Holds information about a slot in the grid.'''
-    def __init__(self, x: int, y: int):
-        self.pos = [x,y]
-        self.player = 0
-
-
-
 if __name__ == '__main__':
     
 
@@ -1,12 +1,22 @@
 from gui import Display
 from logic import Logic
 from bot import Bot
+from worker import BotWorker
 
 
 display = Display(theme='dark')
 game = Logic()
 bot = Bot()
 
+# computes the bot moves without blocking the window
+worker = BotWorker(display, bot)
+
+# milliseconds the bot searches each move, and each reply while it ponders
+BOT_TIME = 300
+
+# milliseconds the empty board stays still after the reset animation
+RESET_PAUSE = 600
+
 
 def action(row: int, col: int, bot_action:bool = False):
     '''Places a piece in the selected column.'''
@@ -21,6 +31,7 @@ def action(row: int, col: int, bot_action:bool = False):
         def timed_call():
             if not search_and_continue(row, col):
                 display.draw_indicator(game.turn, game.column_is_full)
+                ponder()
             if bot_action:
                 game.can_click = True
 
@@ -33,8 +44,15 @@ def action(row: int, col: int, bot_action:bool = False):
 
 
 def bot_move():
-    pos = bot.make_move(game.array)
-    action(pos[0], pos[1], bot_action=True)
+    '''Asks the bot for a move and plays it once it is ready.'''
+    if not game.is_paused:
+        worker.request(game.board, lambda pos: action(pos[0], pos[1], bot_action=True), BOT_TIME)
+
+
+def ponder():
+    '''Lets the bot search its replies while the player chooses a column.'''
+    if game.turn == 1 and game.bot_is_enabled and not game.is_paused:
+        worker.ponder(game.board, BOT_TIME, first=display.mouse_pos)
 
 
 def show_indicator(col: int):
@@ -54,24 +72,18 @@ def reset_game(spacebar_pressed: bool):
     '''Plays the reset animation then restarts the game.'''
     if spacebar_pressed and game.can_reset:
         game.can_reset = False
+        worker.cancel()
 
         display.hide_endscreen()
-        display.fall_animation(game.get_board_state(), game.next_board_state)
-
-        height = game.get_tallest_collumn()
-        delay = 1100
-
-        if height == 5:
-            delay += 200
-        elif height == 6:
-            delay += 400
+        duration = display.fall_animation(game.get_fall_plan())
 
-        display.after(delay, restart)
+        display.after(duration + RESET_PAUSE, restart)
 
 
 def winner_found(segment:list[list[int,int]]):
     '''Stops the game and shows the winner.'''
     game.is_paused = True
+    worker.cancel()
 
     if game.turn == 1:
         game.red_score += 1
@@ -94,6 +106,7 @@ def search_and_continue(row: int, col: int):
         if not game.next_turn():
             enable_reset(tie=True)
             game.is_paused = True
+            worker.cancel()
             return True
         return False
 
@@ -115,6 +128,7 @@ def restart():
 
     if game.turn == 1:
         game.can_click = True
+        ponder()
     else:
         bot_move()
 
@@ -125,6 +139,7 @@ def restart():
 display.bind_click_event(action)
 display.bind_hover_event(show_indicator, hide_indicator)
 display.bind_spacebar_event(reset_game)
+display.bind_theme_event()
 
 
 
@@ -0,0 +1,210 @@
+import json
+import os
+import struct
+from typing import Iterator
+
+
+MAGIC = b'C4GR'
+VERSION = 3
+
+# magic, version, size of the metadata of the file
+FILE_HEADER = struct.Struct('<4sBxH')
+
+# amount of moves, flags, size of the metadata of the game, seed
+# the flags hold the result (2 bits), the first player (1 bit) and the tag (5 bits)
+RECORD_HEADER = struct.Struct('<BBHI')
+
+# largest metadata a size field can describe
+MAX_METADATA = 0xffff
+
+# largest tag of a game
+MAX_TAG = 31
+
+# largest seed of a game
+MAX_SEED = 0xffffffff
+
+# results, the same codes as session.py, which imports the bot
+TIE = 0
+RED = 1
+ORANGE = 2
+
+# result of a game that was stopped before the end
+UNFINISHED = 3
+
+BITS_PER_MOVE = 3
+
+
+def pack_moves(moves: list[int]) -> bytes:
+    '''Returns the columns packed in 3 bits each.'''
+    value = 0
+    for index, col in enumerate(moves):
+        # 7 fits in 3 bits and larger columns would spill into the next move
+        if not 0 <= col < 7:
+            raise ValueError(f'move {index} is column {col}, columns go from 0 to 6')
+        value |= col << (index * BITS_PER_MOVE)
+    return value.to_bytes(_packed_size(len(moves)), 'little')
+
+
+def unpack_moves(data: bytes, count: int) -> list[int]:
+    '''Returns the columns stored in the packed data.'''
+    value = int.from_bytes(data, 'little')
+    return [(value >> (index * BITS_PER_MOVE)) & 0x7 for index in range(count)]
+
+
+def _packed_size(count: int) -> int:
+    return (count * BITS_PER_MOVE + 7) // 8
+
+
+def _encode_metadata(metadata: dict | None) -> bytes:
+    '''Returns the metadata as compact JSON, empty without metadata.'''
+    data = json.dumps(metadata, separators=(',', ':')).encode() if metadata else b''
+    if len(data) > MAX_METADATA:
+        raise ValueError(f'metadata takes {len(data)} bytes, at most {MAX_METADATA} fit in a record')
+    return data
+
+
+def _read(file, size: int, path: str) -> bytes:
+    '''Reads exactly 'size' bytes, a shorter read means the file was cut.'''
+    data = file.read(size)
+    if len(data) < size:
+        raise ValueError(f'{path} ends in the middle of a game')
+    return data
+
+
+def _read_header(file, path: str) -> dict:
+    '''Checks the header of a record file and returns the metadata of the file.'''
+    header = file.read(FILE_HEADER.size)
+    if len(header) < FILE_HEADER.size:
+        raise ValueError(f'{path} is not a version {VERSION} game record file')
+
+    magic, version, size = FILE_HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f'{path} is not a version {VERSION} game record file')
+
+    data = file.read(size)
+    if len(data) < size:
+        raise ValueError(f'{path} ends in the middle of its header')
+    return json.loads(data) if size else {}
+
+
+def read_file_metadata(path: str) -> dict:
+    '''Returns the metadata stored once in the header of a record file.'''
+    with open(path, 'rb') as file:
+        return _read_header(file, path)
+
+
+class GameRecord:
+    '''Holds a stored game.'''
+    def __init__(self, moves: list[int], result: int, first: int = RED, metadata: dict = None, tag: int = 0,
+                 seed: int = 0):
+        # columns in the order they were played
+        self.moves = moves
+
+        # 0 for a tie, 1 if red won, 2 if orange won, 3 if the game did not end
+        self.result = result
+
+        # player that made the first move
+        self.first = first
+
+        self.metadata = metadata or {}
+
+        # small number chosen by the writer, the tournament stores the color of bot A
+        self.tag = tag
+
+        # seed of the random choices of the game, two games with the same seed and tag are the same game
+        self.seed = seed
+
+    def __repr__(self) -> str:
+        return f'GameRecord(result={self.result}, moves={self.moves})'
+
+
+class RecordWriter:
+    '''
+    Appends finished games to a record file.\n
+    Every game takes 8 bytes plus 3 bits per move and its metadata, stored as JSON.
+    Settings shared by every game belong in the metadata of the file, which is
+    written once in the header. Appending to an existing file checks its header,
+    and the metadata must match the one of the file.
+    '''
+    def __init__(self, path: str, metadata: dict = None):
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with open(path, 'rb') as file:
+                self.metadata = _read_header(file, path)
+
+            if metadata is not None and metadata != self.metadata:
+                raise ValueError(f'{path} holds games with other metadata: {self.metadata}')
+
+            self.file = open(path, 'ab')
+        else:
+            self.metadata = metadata or {}
+            data = _encode_metadata(self.metadata)
+
+            self.file = open(path, 'wb')
+            self.file.write(FILE_HEADER.pack(MAGIC, VERSION, len(data)))
+            self.file.write(data)
+
+
+    def __enter__(self) -> 'RecordWriter':
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+    def write(self, moves: list[int], result: int, first: int = RED, metadata: dict = None, tag: int = 0,
+              seed: int = 0):
+        '''Appends a game.'''
+        if len(moves) > 42:
+            raise ValueError(f'a game has at most 42 moves, got {len(moves)}')
+        if result not in (TIE, RED, ORANGE, UNFINISHED) or first not in (RED, ORANGE):
+            raise ValueError(f'invalid result {result} or first player {first}')
+        if not 0 <= tag <= MAX_TAG:
+            raise ValueError(f'the tag must be between 0 and {MAX_TAG}, got {tag}')
+        if not 0 <= seed <= MAX_SEED:
+            raise ValueError(f'the seed must be between 0 and {MAX_SEED}, got {seed}')
+
+        # everything is checked before writing, so a bad game leaves no partial record
+        packed = pack_moves(moves)
+        extra = _encode_metadata(metadata)
+
+        self.file.write(RECORD_HEADER.pack(len(moves), result | (first - 1) << 2 | tag << 3, len(extra), seed))
+        self.file.write(packed)
+        self.file.write(extra)
+
+
+    def write_result(self, result: 'GameResult', metadata: dict = None, tag: int = 0, seed: int = 0):
+        '''Appends a game played by a GameSession.'''
+        self.write(result.moves, result.winner, result.first, metadata, tag, seed)
+
+
+    def flush(self):
+        self.file.flush()
+
+
+    def close(self):
+        self.file.close()
+
+
+def read_records(path: str, metadata: bool = True) -> Iterator[GameRecord]:
+    '''
+    Yields the games stored in a record file one at a time.\n
+    With 'metadata' set to False the metadata of the games is skipped without
+    being decoded. A file cut in the middle of a game raises ValueError once
+    the complete games before it were read.
+    '''
+    with open(path, 'rb') as file:
+        _read_header(file, path)
+
+        while header := file.read(RECORD_HEADER.size):
+            if len(header) < RECORD_HEADER.size:
+                raise ValueError(f'{path} ends in the middle of a game')
+
+            count, flags, extra_size, seed = RECORD_HEADER.unpack(header)
+            if count > 42:
+                raise ValueError(f'{path} holds a game of {count} moves')
+
+            moves = unpack_moves(_read(file, _packed_size(count), path), count)
+            data = _read(file, extra_size, path)
+            extra = json.loads(data) if metadata and extra_size else None
+
+            yield GameRecord(moves, flags & 0x3, (flags >> 2 & 1) + 1, extra, flags >> 3, seed)
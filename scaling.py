@@ -0,0 +1,74 @@
+import os
+from time import perf_counter
+from bot import Bot
+from bitboard import Board
+
+
+# openings searched by the benchmark, as columns played from an empty board
+POSITIONS = ((3, 3, 3, 4, 2, 2, 4, 5),
+             (3, 2, 4, 3, 3),
+             (2, 3, 4, 4, 1),
+             (3, 3, 2, 4, 1, 5),
+             (0, 3, 6, 3, 3, 2))
+
+
+def create_board(moves: tuple[int, ...]) -> tuple[Board, int]:
+    '''Returns the board after the moves, red moving first, and the player to move.'''
+    board = Board()
+    player = 1
+
+    for col in moves:
+        board.play(col, player)
+        player = 1 if player == 2 else 2
+
+    return board, player
+
+
+def measure(depth: int, workers: int) -> tuple[float, list[int]]:
+    '''Returns the time taken to search every position and the moves found.'''
+    total = 0.0
+    found = []
+
+    for moves in POSITIONS:
+        board, player = create_board(moves)
+        bot = Bot(depth=1, player=player, workers=workers)
+
+        # start the worker processes before timing
+        bot.search(board)
+        bot.depth = depth
+
+        start = perf_counter()
+        found.append(bot.search(board))
+        total += perf_counter() - start
+
+        bot.close()
+
+    return total, found
+
+
+def run(depth: int, max_workers: int) -> list[tuple[int, float, float, bool]]:
+    '''Returns (workers, seconds, speedup, same moves as the serial search) for 1 to max_workers processes.'''
+    rows = []
+    serial_time, serial_moves = measure(depth, 1)
+    rows.append((1, serial_time, 1.0, True))
+
+    for workers in range(2, max_workers + 1):
+        seconds, moves = measure(depth, workers)
+        rows.append((workers, seconds, serial_time / seconds if seconds else 0.0, moves == serial_moves))
+
+    return rows
+
+
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Measures the speedup of the parallel bot search.')
+    parser.add_argument('--depth', type=int, default=9)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='largest amount of processes to try')
+    args = parser.parse_args()
+
+    print(f'{"workers":>8} {"seconds":>9} {"speedup":>8}  same move')
+    for workers, seconds, speedup, same in run(args.depth, args.workers):
+        print(f'{workers:>8} {seconds:>9.3f} {speedup:>7.2f}x  {"yes" if same else "NO"}')
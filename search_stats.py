@@ -0,0 +1,94 @@
+import json
+import logging
+from typing import Callable
+
+
+class SearchIteration:
+    '''Results of one depth of the iterative deepening search.'''
+    def __init__(self, depth: int, seconds: float, nodes: int, score: int, col: int, principal_variation: list[int]):
+        self.depth = depth
+        self.seconds = seconds
+        self.nodes = nodes
+        self.score = score
+        self.col = col
+        self.principal_variation = principal_variation
+
+    def as_dict(self) -> dict:
+        return {'depth': self.depth,
+                'seconds': self.seconds,
+                'nodes': self.nodes,
+                'score': self.score,
+                'col': self.col,
+                'pv': self.principal_variation}
+
+
+class SearchStats:
+    '''
+    Counters of one Bot.search( ), filled only while the bot has a stats hook.\n
+    The counters cover the nodes searched by this process, the worker
+    processes of a parallel search are not counted.
+    '''
+    def __init__(self):
+        self.nodes = 0
+        self.leaf_evaluations = 0
+
+        # beta cutoffs and how many of them happened on the first move searched
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+        self.table_probes = 0
+        self.table_hits = 0
+
+        self.depth = 0
+        self.seconds = 0.0
+        self.timed_out = False
+        self.principal_variation = []
+        self.iterations = []
+
+
+    @property
+    def first_move_cutoff_rate(self) -> float:
+        '''Fraction of the cutoffs found on the first move, a measure of the move ordering.'''
+        return self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+
+    @property
+    def branching_factor(self) -> float:
+        '''Effective branching factor, the growth of the nodes from the previous depth to the last one.'''
+        if len(self.iterations) < 2 or not self.iterations[-2].nodes:
+            return 0.0
+        return self.iterations[-1].nodes / self.iterations[-2].nodes
+
+
+    def add_iteration(self, depth: int, seconds: float, nodes: int, score: int, col: int, principal_variation: list[int]):
+        '''Records a completed depth.'''
+        self.iterations.append(SearchIteration(depth, seconds, nodes, score, col, principal_variation))
+        self.depth = depth
+        self.principal_variation = principal_variation
+
+
+    def as_dict(self) -> dict:
+        return {'nodes': self.nodes,
+                'leaf_evaluations': self.leaf_evaluations,
+                'cutoffs': self.cutoffs,
+                'first_move_cutoffs': self.first_move_cutoffs,
+                'first_move_cutoff_rate': self.first_move_cutoff_rate,
+                'table_probes': self.table_probes,
+                'table_hits': self.table_hits,
+                'branching_factor': self.branching_factor,
+                'depth': self.depth,
+                'seconds': self.seconds,
+                'timed_out': self.timed_out,
+                'pv': self.principal_variation,
+                'iterations': [iteration.as_dict() for iteration in self.iterations]}
+
+
+def log_hook(logger: logging.Logger = None, level: int = logging.INFO) -> Callable[[SearchStats], None]:
+    '''Returns a stats hook that logs every search as one line of JSON.'''
+    logger = logger or logging.getLogger('connect4.search')
+
+    def hook(stats: SearchStats):
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps(stats.as_dict()))
+
+    return hook
@@ -0,0 +1,142 @@
+from typing import Iterable
+from logic import Logic
+from bot import Bot
+from bitboard import Board
+
+
+TIE = 0
+RED = 1
+ORANGE = 2
+
+
+class GameResult:
+    '''Holds the outcome of a finished game.'''
+    def __init__(self, winner: int, moves: list[int], segment: tuple[tuple[int, int], ...], first: int):
+        # 0 for a tie, 1 if red won, 2 if orange won
+        self.winner = winner
+
+        # columns in the order they were played
+        self.moves = moves
+
+        # slots of the winning line, empty on a tie
+        self.segment = segment
+
+        # player that made the first move
+        self.first = first
+
+    def __repr__(self) -> str:
+        return f'GameResult(winner={self.winner}, moves={self.moves})'
+
+
+class GameSession:
+    '''
+    Plays games of Connect 4 without a window, images or sound.\n
+    Arguments:
+        red, orange
+            who plays each color:\n
+                None to pass the moves in with play( )\n
+                a Bot created for that color\n
+                a list of columns played in order\n
+                a function that receives (board, player) and returns a column
+        first
+            player that makes the first move, random by default
+    '''
+    def __init__(self, red = None, orange = None, first: int = None):
+        for player, controller in ((RED, red), (ORANGE, orange)):
+            if isinstance(controller, Bot) and controller.player != player:
+                raise ValueError(f'the bot for player {player} was created for player {controller.player}')
+
+        self.controllers = {RED: red, ORANGE: orange}
+        self.first = first
+        self.game = Logic()
+        self.reset()
+
+
+    @property
+    def board(self) -> Board:
+        return self.game.board
+
+
+    @property
+    def turn(self) -> int:
+        return self.game.turn
+
+
+    @property
+    def is_over(self) -> bool:
+        return self.result is not None
+
+
+    def reset(self):
+        '''Clears the board to start a new game.'''
+        self.game.reset()
+        if self.first:
+            self.game.turn = self.first
+
+        self.game.is_paused = False
+        self.starting = self.game.turn
+        self.result = None
+
+        # scripted players start their list again
+        self._scripts = {player: iter(controller) for player, controller in self.controllers.items()
+                         if isinstance(controller, Iterable)}
+
+
+    def play(self, col: int) -> tuple[int, int]:
+        '''Drops a piece of the current player in the column and returns the slot it fell to.'''
+        if self.result:
+            raise RuntimeError('the game is over')
+        if not 0 <= col < 7 or self.game.column_is_full(col):
+            raise ValueError(f'column {col} can not receive a piece')
+
+        pos = self.game.find_bottom((0, col))
+        self.game.update_slot(pos)
+
+        if segment := self.game.search_winner(*pos):
+            self._finish(self.game.turn, segment)
+        elif not self.game.next_turn():
+            self._finish(TIE, ())
+
+        return pos
+
+
+    def step(self) -> tuple[int, int]:
+        '''Asks the current player for a move and plays it.'''
+        player = self.game.turn
+        controller = self.controllers[player]
+
+        if controller is None:
+            raise RuntimeError(f'player {player} moves with play( )')
+
+        if isinstance(controller, Bot):
+            col = controller.make_move(self.board)[1]
+        elif player in self._scripts:
+            col = next(self._scripts[player])
+        else:
+            col = controller(self.board, player)
+
+        return self.play(col)
+
+
+    def run(self) -> GameResult:
+        '''Plays until the game ends and returns the result.'''
+        while not self.result:
+            self.step()
+        return self.result
+
+
+    def _finish(self, winner: int, segment: tuple[tuple[int, int], ...]):
+        '''Stores the result and updates the scores.'''
+        self.game.is_paused = True
+
+        if winner == RED:
+            self.game.red_score += 1
+        elif winner == ORANGE:
+            self.game.orange_score += 1
+
+        self.result = GameResult(winner, self.board.moves[:], segment, self.starting)
+
+
+def play_game(red, orange, first: int = None) -> GameResult:
+    '''Plays a full game between the two players and returns the result.'''
+    return GameSession(red, orange, first).run()
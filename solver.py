@@ -0,0 +1,153 @@
+from bitboard import Board, BOTTOM_MASK, COLUMNS, ROWS, column_mask, possible_moves, winning_cells
+from transposition import TranspositionTable, LOWER, UPPER, NO_MOVE
+
+
+# columns sorted from the center out
+MOVE_ORDER = (3, 2, 4, 1, 5, 0, 6)
+
+SLOTS = ROWS * COLUMNS
+
+COLUMN_MASKS = tuple(column_mask(col) for col in range(COLUMNS))
+
+
+class Solver:
+    '''
+    Computes the exact result of a position with perfect play from both sides.\n
+    Scores are given for the player to move:
+        positive if the player wins, the sooner the win the higher the score\n
+        0 if the game ends in a tie\n
+        negative if the player loses, the sooner the loss the lower the score\n
+    A win with the last piece of the player scores 1, a win with one piece
+    left scores 2 and so on.
+    '''
+    def __init__(self, tt_bytes: int = 64 * 1024 * 1024):
+        self.table = TranspositionTable(tt_bytes)
+        self.nodes = 0
+
+
+    def solve(self, board: Board, player: int) -> int:
+        '''Returns the exact score of the position for the player to move.'''
+        position = board.masks[player-1]
+        occupied = board.occupied
+        moves = board.move_count
+
+        if winning_cells(position, occupied) & possible_moves(occupied):
+            return (SLOTS + 1 - moves) // 2
+
+        low = -((SLOTS - moves) // 2)
+        high = (SLOTS + 1 - moves) // 2
+
+        # narrow the score with null window searches
+        while low < high:
+            middle = low + (high - low) // 2
+            if middle <= 0 and int(low / 2) < middle:
+                middle = int(low / 2)
+            elif middle >= 0 and int(high / 2) > middle:
+                middle = int(high / 2)
+
+            score = self._negamax(position, occupied, moves, middle, middle + 1)
+            if score <= middle:
+                high = score
+            else:
+                low = score
+
+        return low
+
+
+    def best_move(self, board: Board, player: int) -> tuple[int, int]:
+        '''Returns the column with the best score and that score.'''
+        best_col, best_score = None, None
+        opponent = 1 if player == 2 else 2
+
+        for col in MOVE_ORDER:
+            if not board.can_play(col):
+                continue
+
+            if board.is_winning_move(col, player):
+                return col, (SLOTS + 1 - board.move_count) // 2
+
+            board.play(col, player)
+            score = -self.solve(board, opponent)
+            board.undo()
+
+            if best_score is None or score > best_score:
+                best_col, best_score = col, score
+
+        return best_col, best_score
+
+
+    def _negamax(self, position: int, occupied: int, moves: int, alpha: int, beta: int) -> int:
+        '''
+        Returns the score of the position for the player whose pieces are in 'position'.\n
+        The player to move is known to have no immediate win.
+        '''
+        self.nodes += 1
+
+        opponent = position ^ occupied
+        possible = possible_moves(occupied)
+        opponent_wins = winning_cells(opponent, occupied)
+        forced = possible & opponent_wins
+
+        if forced:
+            # two threats at once can't be blocked
+            if forced & (forced - 1):
+                return -((SLOTS - moves) // 2)
+            possible = forced
+
+        # never play below a slot the opponent needs
+        safe = possible & ~(opponent_wins >> 1)
+        if not safe:
+            return -((SLOTS - moves) // 2)
+
+        if moves >= SLOTS - 2:
+            return 0
+
+        # the opponent can't win before its next move
+        low = -((SLOTS - 2 - moves) // 2)
+        if alpha < low:
+            alpha = low
+            if alpha >= beta:
+                return alpha
+
+        # the player can't win with this move since there was no immediate win
+        high = (SLOTS - 1 - moves) // 2
+        key = position + occupied + BOTTOM_MASK
+        best_col = NO_MOVE
+
+        if entry := self.table.probe(key):
+            if entry[2] == UPPER:
+                high = entry[0]
+            else:
+                # a lower bound also remembers the move that reached it
+                best_col = entry[3]
+                if alpha < entry[0]:
+                    alpha = entry[0]
+                    if alpha >= beta:
+                        return alpha
+
+        if beta > high:
+            beta = high
+            if alpha >= beta:
+                return beta
+
+        # the move that caused the last cutoff comes first, then the moves that create more threats
+        ordered = []
+        for col in MOVE_ORDER:
+            move = safe & COLUMN_MASKS[col]
+            if move:
+                threats = 99 if col == best_col else winning_cells(position | move, occupied).bit_count()
+                ordered.append((threats, col, move))
+        ordered.sort(key=lambda item: item[0], reverse=True)
+
+        for _, col, move in ordered:
+            score = -self._negamax(opponent, occupied | move, moves + 1, -beta, -alpha)
+
+            if score >= beta:
+                self.table.store(key, score, 0, LOWER, col)
+                return score
+            if score > alpha:
+                alpha = score
+
+        self.table.store(key, alpha, 0, UPPER)
+
+        return alpha
@@ -0,0 +1,30 @@
+import random
+from bitboard import Board, ROWS, COLUMNS
+
+
+def random_position(rng: random.Random, moves: int) -> tuple[Board, int]:
+    '''Returns a board after 'moves' random moves that didn't end the game, and the player to move.'''
+    while True:
+        board = Board()
+        player = 1
+
+        for _ in range(moves):
+            col = rng.choice(board.legal_moves())
+            if board.is_winning_move(col, player):
+                break
+            board.play(col, player)
+            player = 1 if player == 2 else 2
+        else:
+            return board, player
+
+
+def lines_of_four() -> list[tuple[tuple[int, int], ...]]:
+    '''Returns every line of four slots, in screen coordinates, found by walking the grid.'''
+    lines = []
+    for row in range(ROWS):
+        for col in range(COLUMNS):
+            for dx, dy in ((0, 1), (1, 0), (1, 1), (-1, 1)):
+                line = tuple((row + dx*i, col + dy*i) for i in range(4))
+                if all(0 <= x < ROWS and 0 <= y < COLUMNS for x, y in line):
+                    lines.append(line)
+    return lines
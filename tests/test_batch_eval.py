@@ -0,0 +1,48 @@
+import random
+import numpy as np
+from bitboard import ROWS, COLUMNS
+from threats import ThreatMap
+from bot import Bot
+from batch_eval import evaluate_bitboards, evaluate_grids, to_bitboards
+from helpers import random_position
+
+
+def to_mask(bits: set[int]) -> int:
+    '''Returns the mask with the given bits set.'''
+    return sum(1 << bit for bit in bits)
+
+
+def random_boards(seed: int, count: int) -> list[tuple]:
+    '''Returns (board, player to move) pairs of random games of every length.'''
+    rng = random.Random(seed)
+    return [random_position(rng, rng.randrange(0, 40)) for _ in range(count)]
+
+
+def test_batch_matches_threat_map():
+    positions = random_boards(14, 300)
+    boards = [board for board, _ in positions]
+    grids = np.array([[[board.player_at(row, col) for col in range(COLUMNS)] for row in range(ROWS)]
+                      for board in boards])
+
+    for batch in (evaluate_bitboards(to_bitboards(boards)), evaluate_grids(grids)):
+        for index, board in enumerate(boards):
+            threats = ThreatMap()
+            threats.sync(board)
+
+            assert batch.score[index] == threats.score
+            for player in (1, 2):
+                weak, strong = threats.threats(player)
+                assert int(batch.weak[index, player-1]) == to_mask(weak)
+                assert int(batch.strong[index, player-1]) == to_mask(strong)
+
+
+def test_heuristic_moves_match_the_bot():
+    positions = random_boards(15, 300)
+    batch = evaluate_bitboards(to_bitboards([board for board, _ in positions]))
+
+    for player in (1, 2):
+        moves = batch.heuristic_moves(player)
+        bot = Bot(player=player)
+
+        for index, (board, _) in enumerate(positions):
+            assert moves[index] == bot.make_move(board)[1]
@@ -0,0 +1,71 @@
+import os
+import random
+from bitboard import Board
+from book import OpeningBook, build_book
+from solver import Solver, SLOTS
+from helpers import random_position
+
+
+def mirrored(board: Board) -> Board:
+    '''Returns the board with the same moves played in the reflected columns.'''
+    reflection = Board()
+    player = 1
+    for col in board.moves:
+        reflection.play(6 - col, player)
+        player = 1 if player == 2 else 2
+    return reflection
+
+
+def move_score(solver: Solver, board: Board, col: int, player: int) -> int:
+    '''Returns the exact score of playing the column.'''
+    if board.is_winning_move(col, player):
+        return (SLOTS + 1 - board.move_count) // 2
+
+    board.play(col, player)
+    score = -solver.solve(board, 1 if player == 2 else 2)
+    board.undo()
+    return score
+
+
+def book_positions(root: Board, player: int, depth: int):
+    '''Yields (board, player) of every position the book covers.'''
+    level = [(root, player)]
+    for _ in range(depth + 1):
+        next_level = []
+        for board, player in level:
+            yield board, player
+
+            for col in board.legal_moves():
+                if not board.is_winning_move(col, player):
+                    child = board.copy()
+                    child.play(col, player)
+                    next_level.append((child, 1 if player == 2 else 2))
+        level = next_level
+
+
+def test_book_matches_the_solver(tmp_path):
+    rng = random.Random(12)
+    solver = Solver(tt_bytes=1024 * 1024)
+    path = str(tmp_path / 'line.bk')
+
+    for moves in (22, 23):
+        # with 23 moves the book starts with orange to move
+        root, first = random_position(rng, moves)
+        root_moves = list(root.moves)
+
+        build_book(path, 3, moves=root_moves)
+        assert not os.path.exists(path + '.part')
+
+        book = OpeningBook(path)
+        assert book.depth == len(root_moves) + 3
+
+        for board, player in book_positions(root, first, 3):
+            for position in (board, mirrored(board)):
+                score, col = book.lookup(position, player)
+                assert score == solver.solve(position, player)
+                assert move_score(solver, position, col, player) == score
+
+        # positions before the start of the book are not in it
+        root.undo()
+        assert book.lookup(root, 1 if first == 2 else 2) is None
+        book.close()
@@ -0,0 +1,67 @@
+from bitboard import Board
+from records import RecordWriter, RED, ORANGE, UNFINISHED
+from experience import PositionDatabase, build_database, wilson_interval
+
+
+def replay(moves: list[int]) -> Board:
+    '''Returns the board after the moves, red playing first.'''
+    board = Board()
+    player = RED
+    for col in moves:
+        board.play(col, player)
+        player = ORANGE if player == RED else RED
+    return board
+
+
+def test_wilson_interval():
+    assert wilson_interval(0, 0) == (0.0, 0.0)
+
+    low, high = wilson_interval(1, 1)
+    assert 0.2 < low < 0.21 and high == 1.0
+
+    # more games narrow the interval around the rate
+    low, high = wilson_interval(70, 100)
+    assert 0.6 < low < 0.7 < high < 0.8
+
+
+def test_database_best_move_and_mirror(tmp_path):
+    records = str(tmp_path / 'games.c4r')
+    path = str(tmp_path / 'experience.c4x')
+
+    with RecordWriter(records) as writer:
+        # after 3 1, red won the only game of column 0
+        writer.write([3, 1, 0, 6], RED)
+
+        # and 11 of the 12 games of column 2, a third of them played on the mirrored board
+        for _ in range(7):
+            writer.write([3, 1, 2, 6], RED)
+        writer.write([3, 1, 2, 6], ORANGE)
+        for _ in range(4):
+            writer.write([3, 5, 4, 0], RED)
+
+        # unfinished games don't count
+        for _ in range(20):
+            writer.write([3, 1, 0, 6], UNFINISHED)
+
+    build_database(path, records)
+    database = PositionDatabase(path)
+
+    try:
+        # a single win has a lower bound below 11 wins out of 12
+        assert database.lookup(replay([3, 1]), RED) == (13, 12, 0, 1, 2)
+        assert database.lookup(replay([3, 5]), RED) == (13, 12, 0, 1, 4)
+
+        assert database.lookup(replay([3, 1, 0]), ORANGE) == (1, 0, 0, 1, 6)
+        assert database.lookup(replay([3, 1, 6]), ORANGE) is None
+    finally:
+        database.close()
+
+    # positions seen less often are left out
+    build_database(path, records, min_visits=2)
+    database = PositionDatabase(path)
+
+    try:
+        assert database.lookup(replay([3, 1, 0]), ORANGE) is None
+        assert database.lookup(replay([3, 5]), RED) == (13, 12, 0, 1, 4)
+    finally:
+        database.close()
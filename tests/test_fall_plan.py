@@ -0,0 +1,62 @@
+import random
+from logic import Logic
+
+
+# code of the pieces in the sequence names, the piece in the slot plus 3 times the piece above it
+LETTERS = {'': 0, 'r': 1, 'o': 2}
+
+
+def find_sequence(array: list[list[int]], col: int) -> list[str]:
+    '''The order of the pieces in the column, as Logic._find_sequence( ) returned it before the plan.'''
+    column = [array[row][col] for row in range(6)][::-1]
+    sequence = ['']*6
+
+    letter = {1:'r', 2:'o', 0:''}
+
+    for i in range(1, len(column)):
+        if i == 5:
+            sequence[i] = letter[column[i]]
+        sequence[i-1] = (letter[column[i-1]] + letter[column[i]])
+
+    return sequence
+
+
+def old_fall_sequences(array: list[list[int]]) -> list[list[list[str]]]:
+    '''
+    Returns the names of the sequences every slot played in the old reset animation.\n
+    Replays Logic.get_board_state( ), Logic.next_board_state( ) and the loop of
+    the old fall_animation( ), which chained a sequence for every slot that
+    wasn't empty in each of the 7 steps.
+    '''
+    columns = [find_sequence(array, col) for col in range(7)]
+    board_state = [[columns[col][row] for col in range(7)] for row in range(6)][::-1]
+
+    sequences = [[[] for col in range(7)] for row in range(6)]
+    for _ in range(7):
+        for row in range(6):
+            for col in range(7):
+                if board_state[row][col] != '':
+                    sequences[row][col].append(board_state[row][col])
+
+        board_state.pop()
+        board_state.insert(0, ['' for col in range(7)])
+
+    return sequences
+
+
+def test_fall_plan_matches_the_board_states():
+    rng = random.Random(25)
+
+    for _ in range(300):
+        game = Logic()
+        for _ in range(rng.randrange(43)):
+            col = rng.choice([col for col in range(7) if not game.column_is_full(col)])
+            game.update_slot(game.find_bottom((0, col)))
+            game.next_turn()
+
+        array = [game.array[row] for row in range(6)]
+        plan = game.get_fall_plan()
+
+        for row, names in enumerate(old_fall_sequences(array)):
+            for col, sequence in enumerate(names):
+                assert plan[row][col] == tuple(LETTERS[name[0]] + 3 * LETTERS[name[1:]] for name in sequence)
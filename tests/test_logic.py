@@ -0,0 +1,76 @@
+import random
+from logic import Logic
+from helpers import lines_of_four
+
+
+LINES = lines_of_four()
+
+
+class ListLogic:
+    '''The list of lists grid that Logic used before the bitboard, kept as the reference.'''
+    def __init__(self):
+        self.array = [[0 for col in range(7)] for row in range(6)]
+
+    def update_slot(self, pos: tuple[int, int], player: int):
+        self.array[pos[0]][pos[1]] = player
+
+    def find_bottom(self, pos: tuple[int, int]) -> tuple[int, int] | None:
+        for row in range(5, -1, -1):
+            if self.array[row][pos[1]] == 0:
+                return (row, pos[1])
+
+    def column_is_full(self, col: int) -> bool:
+        return all(self.array[row][col] for row in range(6))
+
+    def winning_lines(self, row: int, col: int) -> list[tuple[tuple[int, int], ...]]:
+        player = self.array[row][col]
+        return [line for line in LINES
+                if (row, col) in line and all(self.array[x][y] == player for x, y in line)]
+
+
+def test_logic_matches_the_list_grid():
+    rng = random.Random(10)
+
+    for _ in range(300):
+        game = Logic()
+        reference = ListLogic()
+
+        while True:
+            for col in range(7):
+                assert game.column_is_full(col) == reference.column_is_full(col)
+                assert game.find_bottom((0, col)) == reference.find_bottom((0, col))
+
+            col = rng.choice([col for col in range(7) if not reference.column_is_full(col)])
+            pos = game.find_bottom((0, col))
+
+            reference.update_slot(pos, game.turn)
+            game.update_slot(pos)
+
+            # the grid view reads the same pieces as the list grid
+            assert [game.array[row] for row in range(6)] == reference.array
+
+            # the heights and masks are what get_fall_plan( ) reads
+            assert game.board.heights == [sum(1 for row in range(6) if reference.array[row][col]) for col in range(7)]
+
+            lines = reference.winning_lines(*pos)
+            segment = game.search_winner(*pos)
+            if lines:
+                assert segment in lines
+                break
+
+            assert segment == ()
+            if not game.next_turn():
+                break
+
+
+def test_reset_empties_the_board():
+    game = Logic()
+    for col in (3, 3, 4):
+        game.update_slot(game.find_bottom((0, col)))
+        game.next_turn()
+
+    game.reset()
+
+    assert [game.array[row] for row in range(6)] == [[0] * 7 for _ in range(6)]
+    assert game.move_count == 0
+    assert all(game.find_bottom((0, col)) == (5, col) for col in range(7))
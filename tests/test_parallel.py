@@ -0,0 +1,38 @@
+import random
+import threading
+from time import perf_counter
+from bitboard import Board
+from bot import Bot
+from helpers import random_position
+
+
+def test_parallel_search_picks_the_serial_move():
+    rng = random.Random(13)
+    parallel = {1: Bot(depth=4, player=1, workers=2), 2: Bot(depth=4, player=2, workers=2)}
+
+    try:
+        for _ in range(30):
+            board, player = random_position(rng, rng.randrange(4, 20))
+            serial = Bot(depth=4, player=player)
+            assert parallel[player].search(board) == serial.search(board)
+    finally:
+        for bot in parallel.values():
+            bot.close()
+
+
+def test_cancel_stops_the_worker_searches():
+    bot = Bot(depth=14, player=1, workers=2)
+
+    try:
+        # cancel in the middle of a search far too deep to finish
+        threading.Timer(0.3, bot.cancel).start()
+        start = perf_counter()
+        bot.search(Board())
+        assert perf_counter() - start < 1.0
+
+        # the searches of the workers stopped with it, so the pool answers at once
+        start = perf_counter()
+        assert bot.executor.submit(abs, -1).result() == 1
+        assert perf_counter() - start < 0.1
+    finally:
+        bot.close()
@@ -0,0 +1,93 @@
+import random
+import pytest
+from records import RecordWriter, read_records, read_file_metadata, pack_moves, unpack_moves, \
+                    TIE, RED, ORANGE, UNFINISHED, MAX_TAG, MAX_SEED
+
+
+def random_games(seed: int, count: int) -> list[tuple]:
+    '''Returns (moves, result, first, metadata, tag, seed) of games with random contents.'''
+    rng = random.Random(seed)
+    games = []
+
+    for index in range(count):
+        moves = [rng.randrange(7) for _ in range(rng.randrange(43))]
+        metadata = {'game': index} if rng.random() < 0.5 else {}
+        games.append((moves, rng.choice((TIE, RED, ORANGE, UNFINISHED)), rng.choice((RED, ORANGE)),
+                      metadata, rng.randrange(MAX_TAG + 1), rng.randrange(MAX_SEED + 1)))
+
+    return games
+
+
+def test_pack_moves_round_trip():
+    rng = random.Random(6)
+    for count in range(43):
+        moves = [rng.randrange(7) for _ in range(count)]
+        assert unpack_moves(pack_moves(moves), count) == moves
+
+
+def test_records_round_trip(tmp_path):
+    path = str(tmp_path / 'games.c4r')
+    games = random_games(seed=7, count=200)
+
+    # the second writer appends to the file of the first one
+    with RecordWriter(path, {'seed': 7}) as writer:
+        for game in games[:100]:
+            writer.write(*game)
+    with RecordWriter(path) as writer:
+        for game in games[100:]:
+            writer.write(*game)
+
+    assert read_file_metadata(path) == {'seed': 7}
+    assert [(record.moves, record.result, record.first, record.metadata, record.tag, record.seed)
+            for record in read_records(path)] == games
+
+    assert [record.metadata for record in read_records(path, metadata=False)] == [{}] * len(games)
+
+
+def test_invalid_columns_raise(tmp_path):
+    # 7 fits in 3 bits and 8 would spill into the next move
+    for col in (-1, 7, 8):
+        with pytest.raises(ValueError):
+            pack_moves([3, col, 3])
+
+    path = tmp_path / 'games.c4r'
+    with RecordWriter(str(path)) as writer:
+        with pytest.raises(ValueError):
+            writer.write([3, 9], UNFINISHED)
+        writer.write([3, 4], UNFINISHED)
+
+    # the rejected game left nothing behind
+    assert [record.moves for record in read_records(str(path))] == [[3, 4]]
+
+
+def test_cut_file_raises(tmp_path):
+    path = tmp_path / 'games.c4r'
+    with RecordWriter(str(path)) as writer:
+        writer.write([3, 3, 4], UNFINISHED, RED, {'note': 'cut'})
+
+    data = path.read_bytes()
+    path.write_bytes(data[:-1])
+
+    with pytest.raises(ValueError, match='ends in the middle of a game'):
+        list(read_records(str(path)))
+
+
+def test_invalid_writes(tmp_path):
+    path = tmp_path / 'games.c4r'
+
+    with RecordWriter(str(path), {'seed': 1}) as writer:
+        with pytest.raises(ValueError):
+            writer.write([0] * 43, TIE)
+        with pytest.raises(ValueError):
+            writer.write([0], RED, tag=MAX_TAG + 1)
+        with pytest.raises(ValueError):
+            writer.write([0], RED, metadata={'text': 'x' * 0x10000})
+        with pytest.raises(ValueError):
+            writer.write([0], RED, seed=MAX_SEED + 1)
+
+    with pytest.raises(ValueError):
+        RecordWriter(str(path), {'seed': 2})
+
+    path.write_bytes(b'not a record file')
+    with pytest.raises(ValueError):
+        RecordWriter(str(path))
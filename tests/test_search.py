@@ -0,0 +1,109 @@
+import random
+from time import perf_counter
+from bitboard import Board
+from bot import Bot, WIN_SCORE
+from threats import ThreatMap
+from win_search import is_winning_move
+from helpers import random_position
+
+
+def minimax_score(board: Board, player: int, depth: int) -> int:
+    '''Returns the score of the position for the player to move, searching every move without pruning.'''
+    moves = board.legal_moves()
+    if not moves:
+        return 0
+
+    for col in moves:
+        if is_winning_move(board, col, player):
+            return WIN_SCORE - board.move_count
+
+    if depth <= 0:
+        threats = ThreatMap(track_cells=False)
+        threats.sync(board)
+        return threats.score if player == 1 else -threats.score
+
+    opponent = 1 if player == 2 else 2
+    best = None
+
+    for col in moves:
+        board.play(col, player)
+        score = -minimax_score(board, opponent, depth - 1)
+        board.undo()
+
+        if best is None or score > best:
+            best = score
+
+    return best
+
+
+def move_scores(board: Board, player: int, depth: int) -> dict[int, int]:
+    '''Returns the minimax score of every legal move of the player.'''
+    opponent = 1 if player == 2 else 2
+    scores = {}
+
+    for col in board.legal_moves():
+        if is_winning_move(board, col, player):
+            scores[col] = WIN_SCORE - board.move_count
+            continue
+
+        board.play(col, player)
+        scores[col] = -minimax_score(board, opponent, depth - 1)
+        board.undo()
+
+    return scores
+
+
+def test_search_matches_minimax():
+    rng = random.Random(2)
+
+    for depth in (1, 2, 3, 4):
+        for _ in range(20):
+            board, player = random_position(rng, rng.randrange(4, 24))
+            scores = move_scores(board, player, depth)
+
+            col = Bot(depth=depth, player=player).search(board)
+            assert scores[col] == max(scores.values())
+
+
+def test_table_hits_keep_the_move():
+    rng = random.Random(3)
+
+    for _ in range(5):
+        # the bot keeps its table along a game, the table of the other bot is always empty
+        bots = {1: Bot(depth=5, player=1), 2: Bot(depth=5, player=2)}
+        board = Board()
+        player = 1
+
+        for _ in range(16):
+            col = bots[player].search(board)
+            assert col == Bot(depth=5, player=player).search(board)
+            if board.is_winning_move(col, player):
+                break
+
+            # the second search of a position is answered from the table
+            hits = bots[player].table.hits
+            assert bots[player].search(board) == col
+            assert bots[player].table.hits > hits
+
+            move = rng.choice(board.legal_moves())
+            if board.is_winning_move(move, player):
+                break
+            board.play(move, player)
+            player = 1 if player == 2 else 2
+
+
+def test_time_budget_is_kept():
+    rng = random.Random(4)
+
+    for budget in (20, 100, 300):
+        for _ in range(5):
+            board, player = random_position(rng, rng.randrange(0, 10))
+            bot = Bot(player=player)
+
+            start = perf_counter()
+            row, col = bot.make_move(board, time_budget_ms=budget)
+            elapsed = (perf_counter() - start) * 1000
+
+            assert board.can_play(col)
+            # the deadline is checked every few hundred nodes
+            assert elapsed < budget + 25
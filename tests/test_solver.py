@@ -0,0 +1,50 @@
+import random
+from bitboard import Board
+from solver import Solver, SLOTS
+from helpers import random_position
+
+
+def exhaustive_score(board: Board, player: int) -> int:
+    '''Returns the score of the position for the player to move by searching every move to the end.'''
+    moves = board.legal_moves()
+    if not moves:
+        return 0
+
+    opponent = 1 if player == 2 else 2
+    best = None
+
+    for col in moves:
+        if board.is_winning_move(col, player):
+            return (SLOTS + 1 - board.move_count) // 2
+
+        board.play(col, player)
+        score = -exhaustive_score(board, opponent)
+        board.undo()
+
+        if best is None or score > best:
+            best = score
+
+    return best
+
+
+def test_solve_matches_exhaustive_search():
+    rng = random.Random(8)
+    solver = Solver(tt_bytes=1024 * 1024)
+
+    for _ in range(40):
+        board, player = random_position(rng, rng.randrange(30, 38))
+        assert solver.solve(board, player) == exhaustive_score(board, player)
+
+
+def test_best_move_reaches_the_score():
+    rng = random.Random(9)
+    solver = Solver(tt_bytes=1024 * 1024)
+
+    for _ in range(20):
+        board, player = random_position(rng, rng.randrange(30, 38))
+        col, score = solver.best_move(board, player)
+
+        assert score == exhaustive_score(board, player)
+        if not board.is_winning_move(col, player):
+            board.play(col, player)
+            assert -exhaustive_score(board, 1 if player == 2 else 2) == score
@@ -0,0 +1,81 @@
+import random
+from bitboard import Board, bit_index
+from threats import ThreatMap, WINDOW_SCORES
+from helpers import lines_of_four
+
+
+LINES = lines_of_four()
+
+
+def brute_force(board: Board) -> tuple[int, tuple[set[int], set[int]], tuple[set[int], set[int]]]:
+    '''Returns the score and the (weak, strong) slots of both players, counted line by line.'''
+    score = 0
+    weak = (set(), set())
+    strong = (set(), set())
+
+    for line in LINES:
+        owners = [board.player_at(x, y) for x, y in line]
+        empty = {bit_index(x, y) for (x, y), owner in zip(line, owners) if not owner}
+
+        for player in (1, 2):
+            own, other = owners.count(player), owners.count(3 - player)
+            if other:
+                continue
+
+            score += WINDOW_SCORES[own] if player == 1 else -WINDOW_SCORES[own]
+            if own == 2:
+                weak[player-1].update(empty)
+            elif own == 3:
+                strong[player-1].update(empty)
+
+    return score, weak, strong
+
+
+def check(threats: ThreatMap, board: Board):
+    score, weak, strong = brute_force(board)
+
+    assert threats.score == score
+    if threats.track_cells:
+        assert threats.threats(1) == (weak[0], strong[0])
+        assert threats.threats(2) == (weak[1], strong[1])
+
+
+def test_play_and_undo_match_brute_force():
+    rng = random.Random(4)
+
+    for track_cells in (True, False):
+        for _ in range(100):
+            board = Board()
+            threats = ThreatMap(track_cells)
+            player = 1
+
+            while board.legal_moves():
+                # an undo now and then, like the search does
+                if board.moves and rng.random() < 0.2:
+                    board.undo()
+                    threats.undo()
+                    player = 1 if player == 2 else 2
+                    check(threats, board)
+
+                col = rng.choice(board.legal_moves())
+                row, col = board.play(col, player)
+                threats.play(bit_index(row, col), player)
+                player = 1 if player == 2 else 2
+                check(threats, board)
+
+
+def test_sync_matches_brute_force():
+    rng = random.Random(5)
+    threats = ThreatMap()
+
+    for _ in range(100):
+        board = Board()
+        player = 1
+
+        for _ in range(rng.randrange(43)):
+            board.play(rng.choice(board.legal_moves()), player)
+            player = 1 if player == 2 else 2
+
+        # keeps the moves shared with the previous board and replays the rest
+        threats.sync(board)
+        check(threats, board)
@@ -0,0 +1,66 @@
+import random
+from bitboard import Board, bit_index, winning_cells
+from win_search import find_winner
+from helpers import lines_of_four
+
+
+LINES = lines_of_four()
+
+
+def brute_force_lines(board: Board, row: int, col: int) -> list[tuple[tuple[int, int], ...]]:
+    '''Returns every line of four pieces of one player that goes through the slot.'''
+    player = board.player_at(row, col)
+    return [line for line in LINES
+            if (row, col) in line and all(board.player_at(x, y) == player for x, y in line)]
+
+
+def play_random_games(seed: int, count: int):
+    '''Yields (board, row, col) after every move of random games played to the end.'''
+    rng = random.Random(seed)
+
+    for _ in range(count):
+        board = Board()
+        player = 1
+
+        while board.legal_moves():
+            row, col = board.play(rng.choice(board.legal_moves()), player)
+            yield board, row, col
+
+            if brute_force_lines(board, row, col):
+                break
+            player = 1 if player == 2 else 2
+
+
+def test_find_winner_matches_brute_force():
+    for board, row, col in play_random_games(seed=1, count=300):
+        lines = brute_force_lines(board, row, col)
+        segment = find_winner(board, row, col)
+
+        if lines:
+            assert segment in lines
+        else:
+            assert segment == ()
+
+
+def test_find_winner_of_an_empty_slot():
+    assert find_winner(Board(), 5, 3) == ()
+
+
+def test_is_win_matches_brute_force():
+    for board, row, col in play_random_games(seed=2, count=300):
+        player = board.player_at(row, col)
+        expected = any(all(board.player_at(x, y) == player for x, y in line) for line in LINES)
+        assert board.is_win(player) == expected
+
+
+def test_winning_cells_match_brute_force():
+    for board, row, col in play_random_games(seed=3, count=100):
+        for player in (1, 2):
+            expected = 0
+            for line in LINES:
+                owners = [board.player_at(x, y) for x, y in line]
+                if owners.count(player) == 3 and owners.count(0) == 1:
+                    x, y = line[owners.index(0)]
+                    expected |= 1 << bit_index(x, y)
+
+            assert winning_cells(board.masks[player-1], board.occupied) == expected
@@ -0,0 +1,180 @@
+from bitboard import Board, HEIGHT, bit_index
+from win_search import WINDOWS
+
+
+# bits of the slots in every line of four
+WINDOW_BITS = tuple(tuple(bit_index(x, y) for x, y in segment) for _, segment in WINDOWS)
+
+# index of the lines of four that go through each slot, by bit
+CELL_WINDOW_INDEXES = tuple(tuple(index for index, bits in enumerate(WINDOW_BITS) if bit in bits)
+                            for bit in range(7 * HEIGHT))
+
+# score of a line that only holds pieces of one player, by amount of pieces
+WINDOW_SCORES = (0, 1, 4, 16, 0)
+
+
+class ThreatMap:
+    '''
+    Keeps the amount of pieces of each player in every line of four.\n
+    Playing or undoing a piece only updates the lines that go through its slot,
+    and keeps up to date:
+        score
+            sum of the open lines of red minus the open lines of orange\n
+        strong
+            empty slots that complete a line of three, per player\n
+        weak
+            empty slots that add a third piece to a line of two, per player\n
+    With 'track_cells' set to False only the counts and the score are kept.
+    '''
+    def __init__(self, track_cells: bool = True):
+        # the search only needs the score, which is cheaper to keep
+        self.track_cells = track_cells
+        self.reset()
+
+
+    def reset(self):
+        '''Removes every piece from the map.'''
+        self.counts = ([0] * len(WINDOWS), [0] * len(WINDOWS))
+        self.occupied = 0
+        self.score = 0
+
+        # (bit, player) of every piece in the order they were played
+        self.moves = []
+
+        # amount of lines of two and three that go through each empty slot, per player
+        self._levels = {2: ([0] * len(CELL_WINDOW_INDEXES), [0] * len(CELL_WINDOW_INDEXES)),
+                        3: ([0] * len(CELL_WINDOW_INDEXES), [0] * len(CELL_WINDOW_INDEXES))}
+
+        self.weak = (set(), set())
+        self.strong = (set(), set())
+        self._cells = {2: self.weak, 3: self.strong}
+
+
+    def threats(self, player: int) -> tuple[set[int], set[int]]:
+        '''Returns the bits of the (weak, strong) slots of the player.'''
+        return (self.weak[player-1], self.strong[player-1])
+
+
+    def play(self, bit: int, player: int):
+        '''Adds a piece of the player in the slot stored in the bit.'''
+        own = self.counts[player-1]
+        other = self.counts[2-player]
+        delta = 0
+
+        if not self.track_cells:
+            for window in CELL_WINDOW_INDEXES[bit]:
+                ally = own[window]
+                if not other[window]:
+                    delta += WINDOW_SCORES[ally+1] - WINDOW_SCORES[ally]
+                elif not ally:
+                    delta += WINDOW_SCORES[other[window]]
+                own[window] = ally + 1
+
+            self.moves.append((bit, player))
+            self.score += delta if player == 1 else -delta
+            return
+
+        for window in CELL_WINDOW_INDEXES[bit]:
+            ally, enemy = own[window], other[window]
+
+            if enemy == 0:
+                delta += WINDOW_SCORES[ally+1] - WINDOW_SCORES[ally]
+                if ally >= 2:
+                    self._mark(window, player, ally, -1)
+                if 2 <= ally + 1 <= 3:
+                    self._mark(window, player, ally + 1, 1, bit)
+
+            elif ally == 0:
+                delta += WINDOW_SCORES[enemy]
+                if enemy >= 2:
+                    self._mark(window, 3-player, enemy, -1)
+
+            own[window] = ally + 1
+
+        self.occupied |= 1 << bit
+        self.moves.append((bit, player))
+        self.score += delta if player == 1 else -delta
+
+
+    def undo(self):
+        '''Removes the last piece played.'''
+        bit, player = self.moves.pop()
+
+        own = self.counts[player-1]
+        other = self.counts[2-player]
+        delta = 0
+
+        if not self.track_cells:
+            for window in CELL_WINDOW_INDEXES[bit]:
+                ally = own[window] - 1
+                own[window] = ally
+                if not other[window]:
+                    delta += WINDOW_SCORES[ally+1] - WINDOW_SCORES[ally]
+                elif not ally:
+                    delta += WINDOW_SCORES[other[window]]
+
+            self.score -= delta if player == 1 else -delta
+            return
+
+        self.occupied &= ~(1 << bit)
+
+        for window in CELL_WINDOW_INDEXES[bit]:
+            ally, enemy = own[window] - 1, other[window]
+            own[window] = ally
+
+            if enemy == 0:
+                delta += WINDOW_SCORES[ally+1] - WINDOW_SCORES[ally]
+                if 2 <= ally + 1 <= 3:
+                    self._mark(window, player, ally + 1, -1, bit)
+                if ally >= 2:
+                    self._mark(window, player, ally, 1)
+
+            elif ally == 0:
+                delta += WINDOW_SCORES[enemy]
+                if enemy >= 2:
+                    self._mark(window, 3-player, enemy, 1)
+
+        self.score -= delta if player == 1 else -delta
+
+
+    def truncate(self, length: int):
+        '''Undoes pieces until only the first 'length' remain.'''
+        while len(self.moves) > length:
+            self.undo()
+
+
+    def sync(self, board: Board):
+        '''Updates the map to hold the same pieces as the board, keeping the moves they share.'''
+        heights = [0] * 7
+        played = []
+
+        for col in board.moves:
+            bit = col * HEIGHT + heights[col]
+            heights[col] += 1
+            played.append((bit, 1 if board.masks[0] >> bit & 1 else 2))
+
+        shared = 0
+        for move, stored in zip(played, self.moves):
+            if move != stored:
+                break
+            shared += 1
+
+        self.truncate(shared)
+        for bit, player in played[shared:]:
+            self.play(bit, player)
+
+
+    def _mark(self, window: int, player: int, level: int, step: int, skip: int = None):
+        '''Adds step to the counter of the empty slots of the window at the given level.'''
+        counters = self._levels[level][player-1]
+        cells = self._cells[level][player-1]
+
+        for bit in WINDOW_BITS[window]:
+            if bit == skip or self.occupied >> bit & 1:
+                continue
+
+            counters[bit] += step
+            if counters[bit] == 0:
+                cells.discard(bit)
+            elif step > 0 and counters[bit] == 1:
+                cells.add(bit)
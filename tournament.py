@@ -0,0 +1,237 @@
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+from bot import Bot
+from session import GameSession, TIE
+from records import RecordWriter, read_records
+from experience import wilson_interval
+
+
+def parse_config(text: str) -> dict:
+    '''
+    Returns the bot settings written in the text.\n
+    Settings are separated by commas, for example 'depth=6,time=50,tt=16':
+        depth
+            search depth, 0 for the one move heuristic\n
+        time
+            time budget of each move in milliseconds\n
+        tt
+            transposition table size in megabytes\n
+        book
+            path of an opening book\n
+        perfect
+            play with the exact solver\n
+        experience
+            path of a position database\n
+    'heuristic' is the same as 'depth=0'.
+    '''
+    config = {'depth': 0, 'time': None, 'tt': 8, 'book': None, 'perfect': False, 'experience': None}
+
+    for item in text.split(','):
+        item = item.strip()
+        if not item or item == 'heuristic':
+            continue
+
+        name, _, value = item.partition('=')
+        if name not in config:
+            raise ValueError(f'unknown bot setting {name!r}')
+
+        if name == 'perfect':
+            config[name] = value.lower() not in ('0', 'false', 'no')
+        elif name in ('book', 'experience'):
+            config[name] = value
+        else:
+            config[name] = int(value)
+
+    return config
+
+
+def available_cpus() -> int:
+    '''Returns the amount of CPUs this process may run on, which can be less than the machine has.'''
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+
+def create_bot(config: dict, player: int) -> Bot:
+    '''Returns a bot with the given settings for the player.'''
+    return Bot(depth=config['depth'], player=player, tt_bytes=config['tt'] * 1024 * 1024,
+               book=config['book'], perfect=config['perfect'], experience=config['experience'])
+
+
+class TimedPlayer:
+    '''Plays the moves of a bot for a game session and measures the time of each move.'''
+    def __init__(self, bot: Bot, time_budget_ms: int, random_plies: int, rng: random.Random):
+        self.bot = bot
+        self.time_budget_ms = time_budget_ms
+        self.random_plies = random_plies
+        self.rng = rng
+
+        self.time = 0.0
+        self.moves = 0
+
+    def __call__(self, board, player) -> int:
+        # the first moves are random so the games differ from each other
+        if board.move_count < self.random_plies:
+            return self.rng.choice(board.legal_moves())
+
+        start = perf_counter()
+        col = self.bot.make_move(board, self.time_budget_ms)[1]
+        self.time += perf_counter() - start
+        self.moves += 1
+
+        return col
+
+
+def play_games(config_a: dict, config_b: dict, first_game: int, count: int,
+               random_plies: int, seed: int) -> tuple[list[int], list[tuple], float, int, float, int]:
+    '''
+    Plays a range of games between the two configurations.\n
+    Returns the result of each game for A (1 win, 0 tie, -1 loss), the
+    (moves, winner, first player, color of A) of each game and the total move
+    time and amount of moves of A and B.
+    '''
+    bots = {}
+    results = []
+    games = []
+    totals = [0.0, 0, 0.0, 0]
+
+    for game in range(first_game, first_game + count):
+        rng = random.Random(seed + game)
+
+        # A changes color every game and the first player changes every two games
+        seat_a = 1 if game % 2 == 0 else 2
+        seat_b = 1 if seat_a == 2 else 2
+        first = 1 if (game // 2) % 2 == 0 else 2
+
+        for name, config, seat in (('a', config_a, seat_a), ('b', config_b, seat_b)):
+            if (name, seat) not in bots:
+                bots[(name, seat)] = create_bot(config, seat)
+
+        player_a = TimedPlayer(bots[('a', seat_a)], config_a['time'], random_plies, rng)
+        player_b = TimedPlayer(bots[('b', seat_b)], config_b['time'], random_plies, rng)
+
+        players = {seat_a: player_a, seat_b: player_b}
+        result = GameSession(players[1], players[2], first).run()
+
+        if result.winner == TIE:
+            results.append(0)
+        else:
+            results.append(1 if result.winner == seat_a else -1)
+
+        games.append((result.moves, result.winner, result.first, seat_a, seed + game))
+
+        totals[0] += player_a.time
+        totals[1] += player_a.moves
+        totals[2] += player_b.time
+        totals[3] += player_b.moves
+
+    return results, games, *totals
+
+
+def run_tournament(config_a: dict, config_b: dict, games: int, workers: int = None,
+                   random_plies: int = 2, seed: int = 0, record: str = None) -> dict:
+    '''
+    Plays the games across a process pool and returns the statistics of A against B.\n
+    The games are appended to the 'record' file when it is given, with the
+    seed of each game and the color of A in its tag. A game whose seed and
+    color are already in the file was recorded by an earlier run with the same
+    seed, so it is left out and counted in 'duplicates'.
+    '''
+    workers = workers or available_cpus()
+    chunk = max(1, games // (workers * 4))
+
+    start = perf_counter()
+    results = []
+    time_a = moves_a = time_b = moves_b = 0
+
+    # (seed, color of A) of the games already in the file
+    recorded = set()
+    if record and os.path.exists(record) and os.path.getsize(record):
+        recorded = {(game.seed, game.tag) for game in read_records(record, metadata=False)}
+
+    writer = RecordWriter(record) if record else None
+    duplicates = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_games, config_a, config_b, first, min(chunk, games - first),
+                                   random_plies, seed)
+                   for first in range(0, games, chunk)]
+
+        for future in futures:
+            chunk_results, chunk_games, chunk_time_a, chunk_moves_a, chunk_time_b, chunk_moves_b = future.result()
+            results.extend(chunk_results)
+
+            if writer:
+                for moves, winner, first, seat_a, game_seed in chunk_games:
+                    if (game_seed, seat_a) in recorded:
+                        duplicates += 1
+                        continue
+                    writer.write(moves, winner, first, tag=seat_a, seed=game_seed)
+
+            time_a += chunk_time_a
+            moves_a += chunk_moves_a
+            time_b += chunk_time_b
+            moves_b += chunk_moves_b
+
+    elapsed = perf_counter() - start
+
+    if writer:
+        writer.close()
+
+    wins = results.count(1)
+    draws = results.count(0)
+    losses = results.count(-1)
+
+    return {'games': games,
+            'duplicates': duplicates,
+            'workers': workers,
+            'wins': wins,
+            'draws': draws,
+            'losses': losses,
+            'win_interval': wilson_interval(wins, games),
+            'draw_interval': wilson_interval(draws, games),
+            'loss_interval': wilson_interval(losses, games),
+            'games_per_second': games / elapsed if elapsed else 0.0,
+            'move_ms_a': 1000 * time_a / moves_a if moves_a else 0.0,
+            'move_ms_b': 1000 * time_b / moves_b if moves_b else 0.0}
+
+
+def format_report(name_a: str, name_b: str, stats: dict) -> str:
+    '''Returns the statistics as readable text.'''
+    games = stats['games']
+    lines = [f'{name_a} vs {name_b}',
+             f'{games} games, {stats["workers"]} workers, {stats["games_per_second"]:.1f} games/s']
+
+    for label, interval in (('wins', 'win_interval'), ('draws', 'draw_interval'), ('losses', 'loss_interval')):
+        low, high = stats[interval]
+        rate = stats[label] / games if games else 0.0
+        lines.append(f'  {label:<7}{rate:7.1%}   95% CI [{low:.1%}, {high:.1%}]')
+
+    lines.append(f'  average move time: {name_a} {stats["move_ms_a"]:.2f} ms, {name_b} {stats["move_ms_b"]:.2f} ms')
+    return '\n'.join(lines)
+
+
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Plays two bot configurations against each other.')
+    parser.add_argument('a', help="settings of the first bot, e.g. 'depth=6'")
+    parser.add_argument('b', nargs='?', default='heuristic', help='settings of the second bot, the heuristic bot by default')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=None, help='processes to use, every CPU the process may use by default')
+    parser.add_argument('--random-plies', type=int, default=2, help='random moves at the start of every game')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--record', default=None, help='file the games are appended to')
+    args = parser.parse_args()
+
+    stats = run_tournament(parse_config(args.a), parse_config(args.b), args.games,
+                           args.workers, args.random_plies, args.seed, args.record)
+    print(format_report(args.a, args.b, stats))
+
+    if stats['duplicates']:
+        print(f'{stats["duplicates"]} games were already in {args.record} and were not recorded again, '
+              f'use another --seed for new games')
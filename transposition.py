@@ -0,0 +1,109 @@
+from array import array
+
+
+# kinds of score stored in an entry
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# bytes used by one entry: key (8) + score (4) + packed info (4)
+ENTRY_BYTES = 16
+
+NO_MOVE = 7
+
+
+def _prime_below(number: int) -> int:
+    '''Returns the largest prime that is not greater than the given number.'''
+    for candidate in range(number, 2, -1):
+        # skip 2^n - 1, the remainder of those only sums groups of bits
+        if candidate & (candidate + 1) == 0:
+            continue
+        if all(candidate % div for div in range(2, int(candidate ** 0.5) + 1)):
+            return candidate
+    return max(1, number)
+
+
+class TranspositionTable:
+    '''
+    Fixed-size table that remembers the result of searched positions.\n
+    Entries are packed in three flat arrays indexed by the position key, so the
+    memory used by the table never grows past 'max_bytes'.\n
+    An entry is replaced when the new result was searched at least as deep or
+    when the stored one belongs to an older search.
+    '''
+    def __init__(self, max_bytes: int = 8 * 1024 * 1024):
+        # a prime size spreads keys that only differ in their high bits
+        self.size = _prime_below(max(1, max_bytes // ENTRY_BYTES))
+
+        self.keys = array('Q', [0]) * self.size
+        self.scores = array('i', [0]) * self.size
+
+        # depth (8 bits) | kind (2 bits) | move (3 bits) | generation (8 bits)
+        self.info = array('I', [0]) * self.size
+
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+
+    @property
+    def memory(self) -> int:
+        '''Bytes used by the entries.'''
+        return self.size * ENTRY_BYTES
+
+
+    def new_search(self):
+        '''Marks the entries stored so far as old, so they are replaced first.'''
+        self.generation = (self.generation + 1) & 0xff
+
+
+    def clear(self):
+        '''Removes every entry and resets the counters.'''
+        self.keys = array('Q', [0]) * self.size
+        self.generation = 0
+        self.hits = self.misses = self.collisions = self.stores = 0
+
+
+    def probe(self, key: int) -> tuple[int, int, int, int] | None:
+        '''Returns the (score, depth, kind, move) stored for the key, None if it is not in the table.'''
+        index = key % self.size
+        stored = self.keys[index]
+
+        if stored == key:
+            self.hits += 1
+            info = self.info[index]
+            return (self.scores[index], info & 0xff, (info >> 8) & 0x3, (info >> 10) & 0x7)
+
+        if stored:
+            self.collisions += 1
+        self.misses += 1
+        return None
+
+
+    def store(self, key: int, score: int, depth: int, kind: int, move: int = NO_MOVE):
+        '''Saves the result of a search if the replacement policy allows it.'''
+        index = key % self.size
+        stored = self.keys[index]
+
+        if stored and stored != key:
+            info = self.info[index]
+            if (info >> 13) == self.generation and (info & 0xff) > depth:
+                return
+
+        self.keys[index] = key
+        self.scores[index] = score
+        self.info[index] = depth | (kind << 8) | (move << 10) | (self.generation << 13)
+        self.stores += 1
+
+
+    def stats(self) -> dict[str, int]:
+        '''Returns the usage counters of the table.'''
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'collisions': self.collisions,
+                'stores': self.stores,
+                'size': self.size,
+                'memory': self.memory}
@@ -1,40 +1,49 @@
+from bitboard import Board, ROWS, COLUMNS, bit_index
 
-def find_completable_lines(x, y) -> list[list]:
-    lines = list()
-    lines.append([(x,i) for i in range(7)])
-    lines.append([(i,y) for i in range(6)])
-    lines.append([(i,abs(i-(x-y))) for i in range((x-y if x-y > 0 else 0), 6) if i-(x-y) < 7])
-    lines.append([(i,abs(i-(x+y))) for i in range((x+y if x+y < 6 else 5), -1, -1) if abs(i-(x+y)) < 7])
 
-    return lines
+# horizontal, vertical, diagonal and anti-diagonal steps in screen coordinates
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (-1, 1))
 
 
-def find_winner_segment(array:list[list[int]], line:list[tuple]) -> list:
-    segment = list()
-    player = 0
-    counter = 0
+def _build_windows() -> list[tuple[int, tuple[tuple[int, int], ...]]]:
+    '''Returns every line of four slots in the board as (mask, segment), grouped by direction.'''
+    windows = []
 
-    for x,y in line:
-        segment.append((x,y))
+    for dx, dy in DIRECTIONS:
+        for row in range(ROWS):
+            for col in range(COLUMNS):
+                segment = tuple((row + dx*i, col + dy*i) for i in range(4))
 
-        if player != array[x][y].player:
-            player = array[x][y].player
-            counter = 1
-            segment = [(x,y)]
-        elif player != 0:
-            counter += 1
+                if all(0 <= x < ROWS and 0 <= y < COLUMNS for x, y in segment):
+                    mask = sum(1 << bit_index(x, y) for x, y in segment)
+                    windows.append((mask, segment))
 
-        if counter == 4:
-            return segment
-        
-    return []
+    return windows
+
+
+# every line of four slots on the board
+WINDOWS = tuple(_build_windows())
+
+# lines of four that go through each slot, indexed by bit
+CELL_WINDOWS = tuple(tuple(window for window in WINDOWS if window[0] >> bit & 1)
+                     for bit in range(bit_index(0, COLUMNS - 1) + 1))
 
 
-def find_winner(array:list[list[int]], row:int, col:int) -> list:
-    lines = find_completable_lines(row, col)
+def find_winner(board:Board, row:int, col:int) -> tuple[tuple[int, int], ...]:
+    '''Returns the segment of four slots completed by the piece at the given position, an empty tuple if there is none.'''
+    player = board.player_at(row, col)
+    if not player:
+        return ()
 
-    for line in lines:
-        if segment := find_winner_segment(array, line):
+    mask = board.masks[player-1]
+
+    for window, segment in CELL_WINDOWS[bit_index(row, col)]:
+        if mask & window == window:
             return segment
-        
-    return []
\ No newline at end of file
+
+    return ()
+
+
+def is_winning_move(board:Board, col:int, player:int) -> bool:
+    '''Returns True if the player connects four by dropping a piece in the column.'''
+    return board.is_winning_move(col, player)
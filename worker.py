@@ -0,0 +1,132 @@
+import queue
+import threading
+import tkinter as tk
+from typing import Callable
+from bot import Bot
+from bitboard import Board
+
+
+class BotWorker:
+    '''
+    Computes the moves of a bot in a background thread.\n
+    The Tk loop keeps running while the bot thinks. The move is put in a
+    thread-safe queue that is polled with after( ), and the callback runs on
+    the Tk thread once the move is ready.\n
+    ponder( ) makes the bot search its replies while the opponent thinks, and
+    stops as soon as a move is requested.\n
+    cancel( ) stops the running search and drops every pending move.
+    '''
+    def __init__(self, root: tk.Tk, bot: Bot, poll_ms: int = 15):
+        self.root = root
+        self.bot = bot
+        self.poll_ms = poll_ms
+
+        # requests older than 'first_valid' were cancelled
+        self.next_request = 0
+        self.first_valid = 0
+
+        self.jobs = queue.Queue()
+        self.results = queue.Queue()
+        self.callbacks = {}
+        self.poll_id = None
+        self.pondering = False
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+
+    @property
+    def is_busy(self) -> bool:
+        return bool(self.callbacks)
+
+
+    def request(self, board: Board, callback: Callable, time_budget_ms: int = None):
+        '''Starts computing a move for the board, the callback receives the position of the move.'''
+        # the new number goes out before the cancel, so the thread can't start the old ponder after it
+        request = self._next()
+        self._stop_pondering()
+
+        self.callbacks[request] = callback
+        self.jobs.put((request, False, board.copy(), time_budget_ms, None))
+
+        if self.poll_id is None:
+            self.poll_id = self.root.after(self.poll_ms, self._poll)
+
+
+    def ponder(self, board: Board, time_budget_ms: int = None, first: int = None):
+        '''Starts searching the replies to the opponent moves on the board.'''
+        request = self._next()
+        self._stop_pondering()
+
+        self.pondering = True
+        self.jobs.put((request, True, board.copy(), time_budget_ms, first))
+
+
+    def cancel(self):
+        '''Stops the running search and discards the pending moves.'''
+        self.first_valid = self.next_request
+        self.callbacks.clear()
+        self.pondering = False
+        self.bot.cancel()
+
+        if self.poll_id is not None:
+            self.root.after_cancel(self.poll_id)
+            self.poll_id = None
+
+
+    def close(self):
+        '''Cancels the pending moves and stops the thread.'''
+        self.cancel()
+        self.jobs.put(None)
+
+
+    def _next(self) -> int:
+        '''Returns the number of a new request.'''
+        request = self.next_request
+        self.next_request += 1
+        return request
+
+
+    def _stop_pondering(self):
+        '''Stops the running ponder search.'''
+        if self.pondering:
+            self.pondering = False
+            self.bot.cancel()
+
+
+    def _run(self):
+        '''Answers the requests in the background thread.'''
+        while (job := self.jobs.get()) is not None:
+            request, ponder, board, time_budget_ms, first = job
+
+            # requests number themselves before cancelling, so a ponder that passes
+            # this check is either the newest job or sees the cancel of the newer one
+            self.bot.cancelled = False
+            if request < self.first_valid:
+                continue
+
+            if ponder:
+                # a newer request makes pondering pointless
+                if request == self.next_request - 1:
+                    self.bot.ponder(board, time_budget_ms, first)
+                continue
+
+            pos = self.bot.make_move(board, time_budget_ms)
+            self.results.put((request, pos))
+
+
+    def _poll(self):
+        '''Hands the finished moves to their callbacks on the Tk thread.'''
+        self.poll_id = None
+
+        while True:
+            try:
+                request, pos = self.results.get_nowait()
+            except queue.Empty:
+                break
+
+            if callback := self.callbacks.pop(request, None):
+                callback(pos)
+
+        if self.callbacks:
+            self.poll_id = self.root.after(self.poll_ms, self._poll)